@@ -3,16 +3,45 @@ Flask API Routes for Stock Prediction Backend
 Using Massive API (Polygon.io) ONLY
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+import json
+import multiprocessing
+import queue
 import sys
 import os
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.massive_api import massive_fetcher
-from models.predictor import stock_predictor
+from utils.history_format import (
+    HISTORY_FORMATS,
+    MSGPACK_MIMETYPE,
+    bars_to_columns,
+    bars_to_rows,
+    downsample_bars,
+    msgpack,
+    pack,
+)
+from utils.metrics import (
+    SERVER_TIMING,
+    metrics,
+    request_timings,
+    server_timing_header,
+    start_request_timing,
+)
+from utils.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, priority_scope
+from utils.response_cache import market_ttl, response_cache
+from utils.structured_log import get_logger
+from models.engine import prediction_engine
+from models.prediction_cache import prediction_cache
+from models.forecasters import DEFAULT_ENGINE, ENGINES
+from models.jobs import JobQueueFull, job_manager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +49,130 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+log = get_logger('server')
+
+def _should_warm_up():
+    """Warm the prediction engine at boot unless disabled (e.g. quote-only workers)"""
+    if os.getenv('PREDICTION_WARMUP', 'true').lower() != 'true':
+        return False
+    # Spawned prediction workers re-import the main module while bootstrapping
+    # (the same flag multiprocessing checks before starting new processes)
+    if getattr(multiprocessing.current_process(), '_inheriting', False):
+        return False
+    # The debug reloader's parent process only watches files; its child serves
+    reloader_parent = (
+        __name__ == '__main__'
+        and os.getenv('FLASK_DEBUG', 'True') == 'True'
+        and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+    )
+    return not reloader_parent
+
+if _should_warm_up():
+    prediction_engine.warm_up()
+
+# RESPONSE CACHE
+
+# Seconds quote/history responses are cached while the market is open
+# (outside trading hours they are kept until RESPONSE_CACHE_TTL_CLOSED or the next open)
+QUOTE_TTL = market_ttl(int(os.getenv('RESPONSE_CACHE_TTL_QUOTE', 60)))
+HISTORY_TTL = market_ttl(int(os.getenv('RESPONSE_CACHE_TTL_HISTORY', 300)))
+
+def _cache_key():
+    # Symbols are case-insensitive; query values are kept as sent
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f"{request.path.upper()}?{query}"
+
+def _cached_response(entry, cache_status):
+    """Serve a cache entry, or 304 when the client already has it"""
+    body, etag, mimetype, expires = entry
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f"public, max-age={max(0, int(expires - time.time()))}",
+        'X-Cache': cache_status
+    }
+    if request.if_none_match.contains(etag):
+        response_cache.record_not_modified()
+        return Response(status=304, headers=headers)
+    return Response(body, status=200, mimetype=mimetype, headers=headers)
+
+def cached(ttl):
+    """
+    Cache a GET view's successful responses
+    
+    Parameters:
+    - ttl: Callable returning the TTL in seconds (see market_ttl)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return view(*args, **kwargs)
+            
+            key = _cache_key()
+            entry = response_cache.get(key)
+            if entry is not None:
+                return _cached_response(entry, 'HIT')
+            
+            response, status = view(*args, **kwargs)
+            if status != 200:
+                return response, status
+            
+            entry = response_cache.put(key, response.get_data(), response.mimetype, ttl())
+            return _cached_response(entry, 'MISS')
+        return wrapper
+    return decorator
+
+# METRICS
+
+HTTP_SECONDS = metrics.histogram(
+    'http_request_seconds',
+    'API response time by route, method and status',
+    ('route', 'method', 'status'),
+)
+
+def _cache_lookups(cache):
+    """Gauge reader for a cache's hit/miss counters"""
+    def read():
+        stats = cache.stats()
+        return {('hit',): stats['hits'], ('miss',): stats['misses']}
+    return read
+
+metrics.gauge('response_cache_lookups', 'Response cache hits and misses', _cache_lookups(response_cache), ('result',))
+metrics.gauge('prediction_cache_entries', 'Forecasts held in the prediction cache', lambda: prediction_cache.stats()['entries'])
+metrics.gauge('response_cache_entries', 'Responses held in the response cache', lambda: response_cache.stats()['entries'])
+metrics.gauge('rate_limit_tokens', 'Massive API requests available right now', lambda: massive_fetcher.rate_limiter.stats()['tokens'])
+metrics.gauge('rate_limit_queue_depth', 'Callers waiting for a rate limit slot', lambda: massive_fetcher.rate_limiter.stats()['queueDepth'])
+
+@app.before_request
+def _start_timing():
+    g.started = time.perf_counter()
+    start_request_timing()
+
+@app.after_request
+def _record_timing(response):
+    started = g.get('started')
+    if started is None:
+        return response
+    
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+    
+    if SERVER_TIMING:
+        response.headers['Server-Timing'] = server_timing_header(request_timings() or [], elapsed)
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Prometheus metrics
+    
+    Upstream API latency/status/retries, rate limit waits, JSON parse time,
+    per-stage prediction timings (data preparation, training, inference),
+    training epochs, cache hits/misses and response times by route.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # HEALTH CHECK
 
 @app.route('/api/health', methods=['GET'])
@@ -32,13 +185,46 @@ def health_check():
         'freeTier': True
     }), 200
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness endpoint
+    
+    200 once the prediction engine has loaded TensorFlow, 503 while it is
+    cold or warming up. /api/health only reports that the process is alive.
+    NumPy engines (ridge, ets) and stock data are served either way.
+    """
+    readiness = prediction_engine.readiness()
+    return jsonify({
+        'success': True,
+        'data': readiness
+    }), 200 if readiness['ready'] else 503
+
+@app.route('/api/ratelimit', methods=['GET'])
+def rate_limit_status():
+    """Current Massive API rate limit budget and queue depth, plus response cache counters"""
+    return jsonify({
+        'success': True,
+        'data': massive_fetcher.rate_limiter.stats(),
+        'cache': response_cache.stats()
+    }), 200
+
 # STOCK DATA ENDPOINTS
 
 @app.route('/api/stocks', methods=['GET'])
+@cached(QUOTE_TTL)
 def get_all_stocks():
-    """Get list of all available stocks"""
+    """
+    Get list of all available stocks
+    
+    Query parameters:
+    - withPrices: "true" to include previous-day quotes from the market snapshot
+    """
     try:
-        stocks = massive_fetcher.get_all_stocks()
+        with_prices = request.args.get('withPrices', 'false').lower() == 'true'
+        # Listing warm-up: the snapshot refresh yields to interactive requests
+        with priority_scope(PRIORITY_BACKGROUND):
+            stocks = massive_fetcher.get_all_stocks(with_prices=with_prices)
         return jsonify({
             'success': True,
             'count': len(stocks),
@@ -51,11 +237,13 @@ def get_all_stocks():
         }), 500
 
 @app.route('/api/stocks/<symbol>', methods=['GET'])
+@cached(QUOTE_TTL)
 def get_stock_detail(symbol):
     """Get detailed information for a specific stock"""
     try:
         symbol = symbol.upper()
-        data = massive_fetcher.get_current_price(symbol)
+        with priority_scope(PRIORITY_INTERACTIVE):
+            data = massive_fetcher.get_current_price(symbol)
         
         if not data:
             return jsonify({
@@ -73,34 +261,94 @@ def get_stock_detail(symbol):
             'error': str(e)
         }), 500
 
+def _get_max_points(value):
+    """
+    Parse the history route's maxPoints query value
+
+    Returns:
+    - None when absent, otherwise an integer of at least 3 (LTTB keeps the
+      first and last bar, so fewer points can't be downsampled)
+    """
+    if value is None:
+        return None
+    try:
+        max_points = int(value)
+    except ValueError:
+        max_points = None
+    if max_points is None or max_points < 3:
+        raise ValueError('maxPoints must be an integer of at least 3')
+    return max_points
+
 @app.route('/api/stocks/<symbol>/history', methods=['GET'])
+@cached(HISTORY_TTL)
 def get_stock_history(symbol):
-    """Get historical data for a stock"""
+    """
+    Get historical data for a stock
+    
+    Query parameters:
+    - period, interval: Range and bar size (default 1y, 1d)
+    - format: 'json' (list of bars, default), 'columnar' (parallel arrays,
+      epoch-millisecond timestamps) or 'msgpack' (columnar, MessagePack body)
+    - maxPoints: Downsample to at most this many bars (LTTB on the close)
+    """
     try:
         symbol = symbol.upper()
         
         # Get query parameters
         period = request.args.get('period', '1y')  # Default: 1 year
         interval = request.args.get('interval', '1d')  # Default: 1 day
+        fmt = request.args.get('format', 'json').lower()
+        try:
+            max_points = _get_max_points(request.args.get('maxPoints'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        if fmt not in HISTORY_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown format '{fmt}'. Use one of: {', '.join(HISTORY_FORMATS)}"
+            }), 400
         
-        print(f"Fetching history for {symbol}: period={period}, interval={interval}")
+        if fmt == 'msgpack' and msgpack is None:
+            return jsonify({
+                'success': False,
+                'error': 'MessagePack is not available on this server (pip install msgpack)'
+            }), 406
         
-        data = massive_fetcher.get_historical_data(symbol, period, interval)
+        with priority_scope(PRIORITY_INTERACTIVE):
+            bars = massive_fetcher.get_historical_bars(symbol, period, interval)
         
-        if not data or len(data) == 0:
+        if bars is None or len(bars) == 0:
             return jsonify({
                 'success': False,
                 'error': f'No historical data found for {symbol}. This might be due to: 1) Free tier limitations, 2) Invalid symbol, or 3) Weekend/market closed'
             }), 404
         
-        return jsonify({
+        total = len(bars)
+        bars = downsample_bars(bars, max_points)
+        
+        payload = {
             'success': True,
             'symbol': symbol,
             'period': period,
             'interval': interval,
-            'count': len(data),
-            'data': data
-        }), 200
+            'count': len(bars),
+        }
+        if len(bars) < total:
+            payload['totalCount'] = total
+        
+        if fmt == 'json':
+            payload['data'] = bars_to_rows(bars)
+            return jsonify(payload), 200
+        
+        payload['format'] = 'columnar'
+        payload['data'] = bars_to_columns(bars)
+        if fmt == 'msgpack':
+            return Response(pack(payload), mimetype=MSGPACK_MIMETYPE), 200
+        return jsonify(payload), 200
     except Exception as e:
         return jsonify({
             'success': False,
@@ -108,11 +356,13 @@ def get_stock_history(symbol):
         }), 500
 
 @app.route('/api/stocks/<symbol>/intraday', methods=['GET'])
+@cached(QUOTE_TTL)
 def get_stock_intraday(symbol):
     """Get today's intraday data (Limited on free tier)"""
     try:
         symbol = symbol.upper()
-        data = massive_fetcher.get_intraday_data(symbol)
+        with priority_scope(PRIORITY_INTERACTIVE):
+            data = massive_fetcher.get_intraday_data(symbol)
         
         if not data:
             return jsonify({
@@ -135,7 +385,15 @@ def get_stock_intraday(symbol):
 
 @app.route('/api/stocks/batch', methods=['POST'])
 def get_multiple_stocks():
-    """Get current prices for multiple stocks"""
+    """
+    Get current prices for multiple stocks
+    
+    Request body:
+    {
+        "symbols": ["AAPL", "NVDA", "GOOGL"],
+        "bulk": true  // Serve from the grouped-daily snapshot (default: true)
+    }
+    """
     try:
         data = request.get_json()
         symbols = data.get('symbols', [])
@@ -148,8 +406,10 @@ def get_multiple_stocks():
         
         # Convert to uppercase
         symbols = [s.upper() for s in symbols]
+        bulk = data.get('bulk', True)
         
-        results = massive_fetcher.get_multiple_stocks_current(symbols)
+        with priority_scope(PRIORITY_INTERACTIVE):
+            results = massive_fetcher.get_multiple_stocks_current(symbols, bulk=bulk)
         
         return jsonify({
             'success': True,
@@ -164,6 +424,137 @@ def get_multiple_stocks():
 
 # PREDICTION ENDPOINTS
 
+def _wants_async(data):
+    """Whether the client asked for a job id instead of waiting for the result"""
+    return bool(data.get('async')) or request.args.get('async', 'false').lower() == 'true'
+
+def _get_engine(data):
+    """Forecasting engine from the request body or ?engine= (None if unknown)"""
+    engine = (data.get('engine') or request.args.get('engine') or DEFAULT_ENGINE).lower()
+    return engine if engine in ENGINES else None
+
+# Longest forecast a request may ask for (the direct model's output width)
+MAX_PREDICTION_DAYS = 30
+
+# Max seconds a synchronous /api/predict/batch waits, history fetches included
+BATCH_TIMEOUT = float(os.getenv('PREDICTION_BATCH_TIMEOUT', 300))
+
+def _valid_days(days):
+    """Whether a requested forecast length is an integer from 1 to MAX_PREDICTION_DAYS"""
+    return isinstance(days, int) and not isinstance(days, bool) and 1 <= days <= MAX_PREDICTION_DAYS
+
+# Monte Carlo samples used for "intervals": true when PREDICTION_INTERVAL_SAMPLES is 0,
+# and the most a request may ask for
+DEFAULT_INTERVAL_SAMPLES = 100
+MAX_INTERVAL_SAMPLES = int(os.getenv('PREDICTION_INTERVAL_SAMPLES_MAX', 500))
+
+def _get_interval_samples(data):
+    """
+    Monte Carlo samples requested for prediction intervals
+    
+    "samples": N (also ?samples=) asks for N samples, 0 for none;
+    "intervals": true/false (also ?intervals=) switches them on with the
+    server default or off.
+    
+    Returns:
+    - Number of samples, or None to use PREDICTION_INTERVAL_SAMPLES
+    
+    Raises:
+    - ValueError: samples is not an integer between 0 and MAX_INTERVAL_SAMPLES
+    """
+    raw = data.get('samples', request.args.get('samples'))
+    if raw is not None:
+        try:
+            samples = None if isinstance(raw, bool) else int(raw)
+        except (TypeError, ValueError):
+            samples = None
+        if samples is None or not 0 <= samples <= MAX_INTERVAL_SAMPLES:
+            raise ValueError(f"Samples parameter must be an integer between 0 and {MAX_INTERVAL_SAMPLES}")
+        return samples
+    
+    intervals = data.get('intervals', request.args.get('intervals'))
+    if intervals is None:
+        return None
+    if isinstance(intervals, str):
+        intervals = intervals.lower() == 'true'
+    if not intervals:
+        return 0
+    return prediction_engine.predictor.interval_samples or DEFAULT_INTERVAL_SAMPLES
+
+def _bad_request(message):
+    return jsonify({
+        'success': False,
+        'error': message
+    }), 400
+
+def _engine_error():
+    return jsonify({
+        'success': False,
+        'error': f"Engine must be one of: {', '.join(ENGINES)}"
+    }), 400
+
+def _job_accepted(job):
+    """202 response pointing the client at the job status endpoint"""
+    return jsonify({
+        'success': True,
+        'jobId': job['id'],
+        'status': job['status'],
+        'statusUrl': f"/api/jobs/{job['id']}"
+    }), 202
+
+def _predict_job(progress, symbol, days, engine, samples):
+    """Job body for a single-symbol prediction"""
+    prediction = prediction_engine.predict(
+        symbol, days, progress=lambda stage, s, **info: progress(stage, symbol=s, **info),
+        engine=engine, samples=samples
+    )
+    if not prediction:
+        raise ValueError(f'Unable to generate prediction for {symbol}. This may be due to insufficient historical data.')
+    return prediction
+
+def _batch_payload(results, started):
+    """Response body for a batch of per-symbol prediction results"""
+    predictions = [r['data'] for r in results if r['success']]
+    errors = [
+        {'symbol': r['symbol'], 'error': r['error']}
+        for r in results if not r['success']
+    ]
+    for error in errors:
+        log.warning("Error predicting", extra=error)
+    
+    return {
+        'success': True,
+        'count': len(predictions),
+        'data': predictions,
+        'errors': errors,
+        'timings': {r['symbol']: r['timings'] for r in results},
+        'elapsedMs': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def _predict_batch_job(progress, symbols, days, engine, samples):
+    """Job body for a batch prediction"""
+    started = time.perf_counter()
+    total = len(set(symbols))
+    completed = []
+    
+    def on_progress(stage, symbol, result=None, **info):
+        if stage == 'done':
+            completed.append(symbol)
+        progress(stage, symbol=symbol, completed=len(completed), total=total, **info)
+    
+    results = prediction_engine.predict_many(symbols, days, progress=on_progress, engine=engine, samples=samples)
+    return _batch_payload(results, started)
+
+def _predict_universe_job(progress, symbols, days, samples):
+    """Job body for a universe prediction"""
+    started = time.perf_counter()
+    
+    def on_progress(stage, symbol, result=None, **info):
+        progress(stage, symbol=symbol, **info)
+    
+    results = prediction_engine.predict_universe(symbols, days, progress=on_progress, samples=samples)
+    return _batch_payload(results, started)
+
 @app.route('/api/predict/<symbol>', methods=['POST'])
 def predict_stock(symbol):
     """
@@ -171,25 +562,41 @@ def predict_stock(symbol):
     
     Request body (optional):
     {
-        "days": 7  // Number of days to predict (default: 7)
+        "days": 7,        // Number of days to predict (default: 7)
+        "engine": "lstm", // lstm, ridge or ets (also ?engine=)
+        "intervals": true, // Monte Carlo prediction intervals, LSTM only (also ?intervals=)
+        "samples": 100,   // Samples for the intervals, 0 = none (also ?samples=)
+        "async": false    // Return a job id immediately (also ?async=true)
     }
     """
     try:
         symbol = symbol.upper()
         
         # Get parameters from request body
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         days = data.get('days', 7)
+        engine = _get_engine(data)
         
         # Validate days parameter
-        if days < 1 or days > 30:
+        if not _valid_days(days):
             return jsonify({
                 'success': False,
                 'error': 'Days parameter must be between 1 and 30'
             }), 400
         
-        # Make prediction
-        prediction = stock_predictor.predict_future(symbol, days)
+        if engine is None:
+            return _engine_error()
+        
+        try:
+            samples = _get_interval_samples(data)
+        except ValueError as e:
+            return _bad_request(str(e))
+        
+        if _wants_async(data):
+            return _job_accepted(job_manager.submit('predict', _predict_job, symbol, days, engine, samples))
+        
+        # Make prediction (LSTM on the worker pool, NumPy engines inline)
+        prediction = prediction_engine.predict(symbol, days, engine=engine, samples=samples)
         
         if not prediction:
             return jsonify({
@@ -202,6 +609,11 @@ def predict_stock(symbol):
             'data': prediction
         }), 200
         
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -213,16 +625,25 @@ def predict_multiple_stocks():
     """
     Predict multiple stocks at once
     
+    Symbols are fetched and predicted in parallel on the worker pool.
+    Successful predictions are returned in "data"; failures are listed in
+    "errors" without failing the whole batch.
+    
     Request body:
     {
         "symbols": ["AAPL", "NVDA", "GOOGL"],
-        "days": 7
+        "days": 7,
+        "engine": "lstm", // lstm, ridge or ets (also ?engine=)
+        "intervals": true, // Monte Carlo prediction intervals, LSTM only (also ?intervals=)
+        "samples": 100,   // Samples for the intervals, 0 = none (also ?samples=)
+        "async": false    // Return a job id immediately (also ?async=true)
     }
     """
     try:
         data = request.get_json()
         symbols = data.get('symbols', [])
         days = data.get('days', 7)
+        engine = _get_engine(data)
         
         if not symbols:
             return jsonify({
@@ -230,32 +651,215 @@ def predict_multiple_stocks():
                 'error': 'No symbols provided'
             }), 400
         
+        if not _valid_days(days):
+            return jsonify({
+                'success': False,
+                'error': 'Days parameter must be between 1 and 30'
+            }), 400
+        
+        if engine is None:
+            return _engine_error()
+        
+        try:
+            samples = _get_interval_samples(data)
+        except ValueError as e:
+            return _bad_request(str(e))
+        
         # Convert to uppercase
         symbols = [s.upper() for s in symbols]
         
-        # Generate predictions for each stock
-        predictions = []
-        for symbol in symbols:
-            try:
-                prediction = stock_predictor.predict_future(symbol, days)
-                if prediction:
-                    predictions.append(prediction)
-            except Exception as e:
-                print(f"Error predicting {symbol}: {str(e)}")
-                continue
+        if _wants_async(data):
+            return _job_accepted(job_manager.submit('predict_batch', _predict_batch_job, symbols, days, engine, samples))
+        
+        # Generate predictions in parallel (symbols unfinished at the timeout are reported as errors)
+        started = time.perf_counter()
+        results = prediction_engine.predict_many(
+            symbols, days, timeout=BATCH_TIMEOUT, engine=engine, samples=samples
+        )
+        
+        return jsonify(_batch_payload(results, started)), 200
         
+    except JobQueueFull as e:
         return jsonify({
-            'success': True,
-            'count': len(predictions),
-            'data': predictions
-        }), 200
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/predict/universe', methods=['POST'])
+def predict_universe():
+    """
+    Predict with the shared cross-symbol model
+    
+    One model is trained on all 50 stocks (and reused until new bars arrive);
+    every symbol is then predicted in a single batched inference pass.
+    Response has the same shape as /api/predict/batch.
+    
+    Request body (optional):
+    {
+        "symbols": ["AAPL", "NVDA"],  // Default: all 50 stocks
+        "days": 7,
+        "intervals": true, // Monte Carlo prediction intervals (also ?intervals=)
+        "samples": 100,  // Samples for the intervals, 0 = none (also ?samples=)
+        "async": false  // Return a job id immediately (also ?async=true)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = [s.upper() for s in data.get('symbols') or []] or None
+        days = data.get('days', 7)
         
+        if not _valid_days(days):
+            return jsonify({
+                'success': False,
+                'error': 'Days parameter must be between 1 and 30'
+            }), 400
+        
+        try:
+            samples = _get_interval_samples(data)
+        except ValueError as e:
+            return _bad_request(str(e))
+        
+        if _wants_async(data):
+            return _job_accepted(job_manager.submit('predict_universe', _predict_universe_job, symbols, days, samples))
+        
+        started = time.perf_counter()
+        results = prediction_engine.predict_universe(symbols, days, samples=samples)
+        
+        return jsonify(_batch_payload(results, started)), 200
+        
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/predict/stream', methods=['GET'])
+def stream_predictions():
+    """
+    Stream predictions as Server-Sent Events
+    
+    Query parameters:
+    - symbols: Comma-separated stock symbols (e.g. AAPL,NVDA,GOOGL)
+    - days: Number of days to predict (default: 7)
+    - engine: lstm (default), ridge or ets
+    - intervals / samples: Monte Carlo prediction intervals (as for /api/predict/batch)
+    
+    Events:
+    - progress: {"symbol", "stage", ...} stage changes and per-epoch training progress
+    - prediction: prediction payload for one symbol, sent as soon as it finishes
+    - symbol-error: {"symbol", "error"} for a symbol that could not be predicted
+    - done: {"count", "errors", "elapsedMs"} once every symbol has finished
+    - failed: {"error"} if the whole run aborted; sent instead of done
+    
+    Every stream ends with exactly one done or failed event.
+    """
+    symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    days = request.args.get('days', 7, type=int)
+    engine = _get_engine({})
+    
+    if not symbols:
+        return jsonify({
+            'success': False,
+            'error': 'No symbols provided'
+        }), 400
+    
+    if not _valid_days(days):
+        return jsonify({
+            'success': False,
+            'error': 'Days parameter must be between 1 and 30'
+        }), 400
+    
+    if engine is None:
+        return _engine_error()
+    
+    try:
+        samples = _get_interval_samples({})
+    except ValueError as e:
+        return _bad_request(str(e))
+    
+    events = queue.Queue()
+    finished = object()
+    
+    def on_progress(stage, symbol, result=None, **info):
+        if stage == 'done':
+            if result['success']:
+                events.put(_sse('prediction', result['data']))
+            else:
+                events.put(_sse('symbol-error', {'symbol': symbol, 'error': result['error']}))
+        else:
+            events.put(_sse('progress', {'symbol': symbol, 'stage': stage, **info}))
+    
+    def run():
+        started = time.perf_counter()
+        try:
+            results = prediction_engine.predict_many(
+                symbols, days, progress=on_progress, engine=engine, samples=samples
+            )
+            events.put(_sse('done', {
+                'count': sum(1 for r in results if r['success']),
+                'errors': sum(1 for r in results if not r['success']),
+                'elapsedMs': round((time.perf_counter() - started) * 1000, 1)
+            }))
+        except Exception as e:
+            log.error("Prediction stream failed", extra={'symbols': symbols, 'error': str(e)})
+            events.put(_sse('failed', {'error': str(e)}))
+        finally:
+            events.put(finished)
+    
+    threading.Thread(target=run, name='predict-stream', daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                event = events.get(timeout=15)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+            if event is finished:
+                return
+            yield event
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get status of an asynchronous prediction job
+    
+    Returns status (queued, running, completed, failed), the current stage
+    (fetching, training, inferring, done) and the result once completed.
+    """
+    job = job_manager.get(job_id)
+    
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found or expired'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job
+    }), 200
+
 # ERROR HANDLERS
 
 @app.errorhandler(404)
@@ -288,13 +892,19 @@ if __name__ == '__main__':
     
      Available Endpoints:
     - GET  /api/health
-    - GET  /api/stocks                    (Get all 50 stocks)
+    - GET  /api/ready                     (Prediction engine warm?)
+    - GET  /api/ratelimit                 (Rate limit budget)
+    - GET  /api/metrics                   (Prometheus metrics)
+    - GET  /api/stocks                    (Get all 50 stocks, ?withPrices=true)
     - GET  /api/stocks/<symbol>           (Get current price)
     - GET  /api/stocks/<symbol>/history   (Get historical data)
     - GET  /api/stocks/<symbol>/intraday  (Get today's data)
     - POST /api/stocks/batch              (Get multiple stocks)
-    - POST /api/predict/<symbol>          (AI Prediction)
+    - POST /api/predict/<symbol>          (AI Prediction, engine=lstm|ridge|ets)
     - POST /api/predict/batch             (Batch predictions)
+    - POST /api/predict/universe          (Shared model, all stocks at once)
+    - GET  /api/predict/stream            (Streamed predictions, SSE)
+    - GET  /api/jobs/<id>                 (Async prediction job status)
     
      FREE TIER NOTES:
     - Rate limit: 5 API calls per minute
@@ -0,0 +1,260 @@
+"""
+Local Polygon/Massive API Stand-in
+Serves synthetic (or recorded) aggregates responses with configurable
+latency and 429 throttling so the backend can be benchmarked offline
+
+Usage:
+    python benchmarks/fake_polygon.py --port 8765 --latency 50 --rate-limit 5
+    MASSIVE_BASE_URL=http://127.0.0.1:8765 MASSIVE_API_KEY=bench python app/server.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+# Synthetic price paths start here so every request sees the same history
+ANCHOR_DATE = np.datetime64('2015-01-02')
+
+# Daily bars are stamped at midnight New York time (05:00 UTC in winter)
+BAR_OFFSET_MS = 5 * 3600 * 1000
+
+AGGS_RANGE = re.compile(r'^/v2/aggs/ticker/([^/]+)/range/(\d+)/(day|week|month)/([\d-]+)/([\d-]+)$')
+AGGS_PREV = re.compile(r'^/v2/aggs/ticker/([^/]+)/prev$')
+AGGS_GROUPED = re.compile(r'^/v2/aggs/grouped/locale/us/market/stocks/([\d-]+)$')
+
+
+def synthetic_bars(symbol, from_date, to_date):
+    """
+    Deterministic daily OHLCV bars for a symbol
+
+    Each symbol gets its own seeded geometric random walk over business
+    days, so overlapping requests (e.g. store top-ups) always agree.
+
+    Returns:
+    - List of aggregates result dicts (t, o, h, l, c, v, vw, n)
+    """
+    start = max(np.datetime64(from_date), ANCHOR_DATE)
+    end = np.datetime64(to_date)
+    if end < start:
+        return []
+
+    days = np.arange(ANCHOR_DATE, end + 1)
+    days = days[np.is_busday(days)]
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    n = len(days)
+    returns = rng.normal(0.0003, 0.018, n)
+    close = (20 + (zlib.crc32(symbol.encode()) % 400)) * np.exp(np.cumsum(returns))
+    open_ = close * np.exp(rng.normal(0, 0.006, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.008, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.008, n)))
+    volume = rng.integers(1_000_000, 60_000_000, n)
+
+    keep = days >= start
+    t = days[keep].astype('datetime64[ms]').astype(np.int64) + BAR_OFFSET_MS
+    return [
+        {
+            't': int(t[i]), 'o': round(float(o), 4), 'h': round(float(h), 4),
+            'l': round(float(lo), 4), 'c': round(float(c), 4), 'v': int(v),
+            'vw': round(float((h + lo + c) / 3), 4), 'n': int(v // 100),
+        }
+        for i, (o, h, lo, c, v) in enumerate(zip(
+            open_[keep], high[keep], low[keep], close[keep], volume[keep]
+        ))
+    ]
+
+
+def _resample(results, timespan):
+    """Aggregate synthetic daily results into week/month bars"""
+    if timespan == 'day' or not results:
+        return results
+    periods = {}
+    for bar in results:
+        day = date.fromtimestamp(bar['t'] / 1000)
+        key = day.isocalendar()[:2] if timespan == 'week' else (day.year, day.month)
+        periods.setdefault(key, []).append(bar)
+    return [
+        {
+            't': bars[0]['t'], 'o': bars[0]['o'], 'h': max(b['h'] for b in bars),
+            'l': min(b['l'] for b in bars), 'c': bars[-1]['c'], 'v': sum(b['v'] for b in bars),
+        }
+        for bars in periods.values()
+    ]
+
+
+class FakePolygonServer:
+    """Threaded HTTP server answering the aggregates endpoints the fetcher uses"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0,
+                 rate_limit=None, throttle_probability=0.0, recordings=None, symbols=None):
+        """
+        Parameters:
+        - latency_ms / jitter_ms: Delay added to every response (uniform jitter)
+        - rate_limit: Requests per second before answering 429 (None = unlimited)
+        - throttle_probability: Chance of answering 429 regardless of rate
+        - recordings: Directory of recorded JSON responses; a request for
+          /v2/aggs/ticker/AAPL/prev is served from v2_aggs_ticker_AAPL_prev.json
+          when that file exists
+        - symbols: Tickers included in grouped-daily responses
+        """
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.throttle_probability = throttle_probability
+        self.recordings = recordings
+        self.symbols = symbols or ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = float(rate_limit or 0)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def start(self):
+        """Serve in a background thread; returns the base URL"""
+        handler = self._make_handler()
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            # Benchmarks open many connections at once
+            request_queue_size = 256
+
+        self._httpd = Server((self.host, self.port), handler)
+        threading.Thread(target=self._httpd.serve_forever, name='fake-polygon', daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def stats(self):
+        return {'requests': self.requests, 'throttled': self.throttled}
+
+    def _throttle(self):
+        """Whether this request should get a 429"""
+        with self._lock:
+            self.requests += 1
+            throttled = random.random() < self.throttle_probability
+            if self.rate_limit and not throttled:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                else:
+                    throttled = True
+            if throttled:
+                self.throttled += 1
+            return throttled
+
+    def _respond(self, path):
+        """(status, payload) for an API path"""
+        if self.recordings:
+            recorded = os.path.join(self.recordings, path.strip('/').replace('/', '_') + '.json')
+            if os.path.exists(recorded):
+                with open(recorded) as f:
+                    return 200, json.load(f)
+
+        match = AGGS_RANGE.match(path)
+        if match:
+            symbol, _, timespan, from_date, to_date = match.groups()
+            results = _resample(synthetic_bars(symbol, from_date, to_date), timespan)
+            return 200, {'ticker': symbol, 'status': 'OK', 'resultsCount': len(results), 'results': results}
+
+        match = AGGS_PREV.match(path)
+        if match:
+            symbol = match.group(1)
+            today = np.datetime64(date.today().isoformat())
+            results = synthetic_bars(symbol, str(today - 7), str(today - 1))[-1:]
+            for bar in results:
+                bar['T'] = symbol
+            return 200, {'ticker': symbol, 'status': 'OK', 'resultsCount': len(results), 'results': results}
+
+        match = AGGS_GROUPED.match(path)
+        if match:
+            day = match.group(1)
+            results = []
+            for symbol in self.symbols:
+                bars = synthetic_bars(symbol, day, day)
+                if bars:
+                    bars[0]['T'] = symbol
+                    results.append(bars[0])
+            return 200, {'status': 'OK', 'resultsCount': len(results), 'results': results}
+
+        return 404, {'status': 'NOT_FOUND', 'error': f'Unknown endpoint {path}'}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+                if delay:
+                    time.sleep(delay / 1000)
+
+                if server._throttle():
+                    status, payload = 429, {'status': 'ERROR', 'error': 'Too many requests'}
+                    headers = {'Retry-After': '1'}
+                else:
+                    status, payload = server._respond(urlparse(self.path).path)
+                    headers = {}
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Polygon/Massive API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per request (ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='Uniform latency jitter (ms)')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second before 429s')
+    parser.add_argument('--throttle', type=float, default=0.0, help='Probability of a random 429')
+    parser.add_argument('--recordings', default=None, help='Directory of recorded JSON responses')
+    args = parser.parse_args()
+
+    server = FakePolygonServer(
+        args.host, args.port, args.latency, args.jitter,
+        args.rate_limit, args.throttle, args.recordings,
+    )
+    print(f"Fake Polygon API on {server.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Offline Benchmark Suite
+Micro-benchmarks of the data and prediction hot paths plus end-to-end
+route benchmarks, all against the local fake Polygon server
+
+Usage:
+    python benchmarks/run.py                      # full run
+    python benchmarks/run.py --quick              # skip LSTM training
+    python benchmarks/run.py --compare results/old.json
+
+Results (latency percentiles, throughput, peak RSS) are written as JSON to
+benchmarks/results/ unless --out is given.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Add backend directory to path for imports
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from fake_polygon import FakePolygonServer, synthetic_bars
+
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+def summarize(samples_ms):
+    """Latency statistics in milliseconds"""
+    ordered = sorted(samples_ms)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        'n': len(ordered),
+        'meanMs': round(statistics.fmean(ordered), 3),
+        'p50Ms': round(percentile(50), 3),
+        'p90Ms': round(percentile(90), 3),
+        'p99Ms': round(percentile(99), 3),
+        'minMs': round(ordered[0], 3),
+        'maxMs': round(ordered[-1], 3),
+    }
+
+
+def measure(fn, repeat=20, warmup=1):
+    """Time repeated calls of fn()"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {'self': round(own / scale, 1), 'children': round(children / scale, 1)}
+
+
+def configure_environment(args, workdir, base_url):
+    """Point the backend at the fake server and throwaway stores (before importing it)"""
+    os.environ.update({
+        'MASSIVE_BASE_URL': base_url,
+        'MASSIVE_API_KEY': 'benchmark',
+        'MASSIVE_RATE_LIMIT': str(args.api_rate_limit),
+        'MASSIVE_RATE_PERIOD': '1',
+        'MASSIVE_CONCURRENCY': str(args.api_concurrency),
+        'BAR_STORE_DIR': os.path.join(workdir, 'bars'),
+        'MODEL_REGISTRY_DIR': os.path.join(workdir, 'models'),
+        'PREDICTION_POOL': args.pool,
+        'PREDICTION_WARMUP': 'false',
+        'RESPONSE_CACHE': 'false' if args.no_cache else 'true',
+        'PREDICTION_CACHE': 'false' if args.no_cache else 'true',
+        'FLASK_DEBUG': 'False',
+        'TF_CPP_MIN_LOG_LEVEL': '3',
+        # Retries and fallbacks are still logged; per-request info is not
+        'LOG_LEVEL': 'WARNING',
+    })
+
+
+class Quiet:
+    """Silence anything the backend writes to stdout while timing"""
+
+    def __enter__(self):
+        self._stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout = self._stdout
+
+
+# MICRO-BENCHMARKS
+
+def micro_benchmarks(args):
+    from utils.bar_store import bars_from_results, resample_bars
+    from utils.history_format import bars_to_columns, bars_to_rows, downsample_bars
+    from utils.massive_api import massive_fetcher
+    from models.forecasters import FORECASTERS
+    from models.predictor import StockPredictor
+
+    symbols = list(massive_fetcher.POPULAR_STOCKS)[:args.symbols]
+    results = {}
+
+    def run(name, fn, repeat=None):
+        print(f"  {name}...", flush=True)
+        with Quiet():
+            results[name] = measure(fn, repeat or args.repeat)
+
+    # Fetch + parse through the API (one cold request per symbol), then the store
+    cold = []
+    with Quiet():
+        for symbol in symbols:
+            started = time.perf_counter()
+            massive_fetcher.get_historical_data(symbol, '2y', '1d')
+            cold.append((time.perf_counter() - started) * 1000)
+    results['history.fetch_cold'] = summarize(cold)
+    print("  history.fetch_cold", flush=True)
+
+    run('history.fetch_warm', lambda: massive_fetcher.get_historical_data(symbols[0], '2y', '1d'))
+    run('history.fetch_many_async', lambda: massive_fetcher.async_client.gather(
+        'get_historical_data', symbols, '2y', '1d'), repeat=max(3, args.repeat // 5))
+
+    # Decoding a raw 2-year aggregates response into a bar array
+    payload = json.dumps({'results': synthetic_bars(symbols[0], '2024-01-01', '2025-12-31')})
+    run('history.parse_aggregates', lambda: bars_from_results(json.loads(payload)['results']))
+
+    bars = massive_fetcher.get_historical_bars(symbols[0], '2y', '1d')
+    run('history.bars_to_rows', lambda: bars_to_rows(bars))
+    run('history.bars_to_columns', lambda: bars_to_columns(bars))
+    run('history.lttb_300', lambda: downsample_bars(bars, 300))
+    run('history.resample_week', lambda: resample_bars(bars, 'week'))
+
+    predictor = StockPredictor()
+    predictor.epochs = args.epochs
+    prices = predictor.extract_prices(bars)
+
+    run('predictor.extract_prices', lambda: predictor.extract_prices(bars))
+
+    from sklearn.preprocessing import MinMaxScaler
+    run('predictor.prepare_data', lambda: predictor.prepare_data(
+        prices, predictor.sequence_length, MinMaxScaler(), predictor.output_days()))
+
+    for name, forecaster in FORECASTERS.items():
+        run(f"forecaster.{name}", lambda f=forecaster: f.forecast(prices, 30))
+
+    if not args.quick:
+        run('predictor.train_model', lambda: predictor.train_model(prices, epochs=predictor.epochs, batch_size=predictor.batch_size), repeat=args.train_repeat)
+
+        # First call trains and stores a model; later calls load it from the registry
+        with Quiet():
+            started = time.perf_counter()
+            predictor.predict_future(symbols[1], 7, massive_fetcher)
+        results['predictor.predict_future_cold'] = summarize([(time.perf_counter() - started) * 1000])
+        print("  predictor.predict_future_cold", flush=True)
+        run('predictor.predict_future_warm', lambda: predictor.predict_future(symbols[1], 7, massive_fetcher),
+            repeat=max(3, args.repeat // 4))
+
+    return results
+
+
+# ROUTE BENCHMARKS
+
+def route_cases(args, symbols):
+    cases = [
+        ('GET /api/health', 'GET', '/api/health', None),
+        ('GET /api/stocks/<symbol>', 'GET', f"/api/stocks/{symbols[0]}", None),
+        ('GET /history 2y', 'GET', f"/api/stocks/{symbols[0]}/history?period=2y", None),
+        ('GET /history 2y columnar maxPoints=300', 'GET',
+         f"/api/stocks/{symbols[0]}/history?period=2y&format=columnar&maxPoints=300", None),
+        ('POST /api/stocks/batch', 'POST', '/api/stocks/batch', {'symbols': symbols}),
+        ('POST /api/predict/<symbol> ridge', 'POST', f"/api/predict/{symbols[0]}", {'days': 7, 'engine': 'ridge'}),
+    ]
+    if not args.quick:
+        cases.append(('POST /api/predict/<symbol> lstm', 'POST', f"/api/predict/{symbols[0]}", {'days': 7}))
+    return cases
+
+
+def route_benchmarks(args):
+    import requests
+    from werkzeug.serving import make_server
+
+    sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), 'app'))
+    with Quiet():
+        import server
+    from utils.massive_api import massive_fetcher
+
+    # Train route models with --epochs too, so LSTM route timings compare
+    # across runs; workers read the predictor's settings() on every job
+    server.prediction_engine.predictor.epochs = args.epochs
+
+    # Per-request access logs would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{httpd.server_port}"
+
+    symbols = list(massive_fetcher.POPULAR_STOCKS)[:args.symbols]
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    results = {}
+    try:
+        for name, method, path, body in route_cases(args, symbols):
+            print(f"  {name}...", flush=True)
+
+            def call():
+                started = time.perf_counter()
+                response = session().request(method, base_url + path, json=body, timeout=600)
+                return (time.perf_counter() - started) * 1000, response.status_code
+
+            with Quiet():
+                call()  # warm-up (first LSTM call trains the model)
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                    samples = list(pool.map(lambda _: call(), range(args.requests)))
+                elapsed = time.perf_counter() - started
+
+            stats = summarize([ms for ms, _ in samples])
+            stats['throughputRps'] = round(len(samples) / elapsed, 1)
+            stats['errors'] = sum(1 for _, status in samples if status >= 400)
+            results[name] = stats
+    finally:
+        httpd.shutdown()
+        with Quiet():
+            server.prediction_engine.shutdown()
+
+    return results
+
+
+# REPORTING
+
+def compare(current, baseline):
+    """Print p50 changes against an earlier results file"""
+    print(f"\nComparison with {baseline['meta']['startedAt']} (p50, negative is faster):")
+    for section in ('micro', 'routes'):
+        for name, stats in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if not old or not old.get('p50Ms'):
+                continue
+            change = (stats['p50Ms'] - old['p50Ms']) / old['p50Ms'] * 100
+            print(f"  {name:<48} {old['p50Ms']:>10.2f} -> {stats['p50Ms']:>10.2f} ms  ({change:+.1f}%)")
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'benchmark':<48} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'rps':>8}")
+    for name, stats in results.items():
+        rps = stats.get('throughputRps', '')
+        print(f"  {name:<48} {stats['p50Ms']:>10.2f} {stats['p90Ms']:>10.2f} {stats['p99Ms']:>10.2f} {rps:>8}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the RialoPredict backend')
+    parser.add_argument('--quick', action='store_true', help='Skip LSTM training/prediction benchmarks')
+    parser.add_argument('--only', choices=('micro', 'routes'), help='Run one group only')
+    parser.add_argument('--repeat', type=int, default=20, help='Samples per micro-benchmark')
+    parser.add_argument('--train-repeat', type=int, default=2, help='Samples for train_model')
+    parser.add_argument('--epochs', type=int, default=2, help='Training epochs for LSTM benchmarks')
+    parser.add_argument('--symbols', type=int, default=10, help='Symbols used for fetch/batch benchmarks')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route benchmark')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients per route benchmark')
+    parser.add_argument('--pool', choices=('thread', 'process'), default='thread', help='Prediction worker pool')
+    parser.add_argument('--no-cache', action='store_true', help='Disable response and prediction caches')
+    parser.add_argument('--latency', type=float, default=20, help='Fake API latency per request (ms)')
+    parser.add_argument('--jitter', type=float, default=5, help='Fake API latency jitter (ms)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='Fake API probability of a 429')
+    parser.add_argument('--fake-rate-limit', type=float, default=None, help='Fake API requests/second before 429s')
+    parser.add_argument('--recordings', default=None, help='Directory of recorded API responses to serve')
+    parser.add_argument('--api-rate-limit', type=int, default=1000, help='Client-side rate limit (requests/second)')
+    parser.add_argument('--api-concurrency', type=int, default=20, help='MASSIVE_CONCURRENCY for the async client')
+    parser.add_argument('--out', default=None, help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='Earlier results file to compare against')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started_at = datetime.now().isoformat(timespec='seconds')
+    workdir = tempfile.mkdtemp(prefix='rialo-bench-')
+
+    fake_api = FakePolygonServer(
+        latency_ms=args.latency, jitter_ms=args.jitter, rate_limit=args.fake_rate_limit,
+        throttle_probability=args.throttle, recordings=args.recordings,
+    )
+    configure_environment(args, workdir, fake_api.start())
+    print(f"Fake Polygon API on {fake_api.base_url}, stores in {workdir}")
+
+    # Grouped-daily responses cover the same tickers the app serves
+    from utils.massive_api import massive_fetcher
+    fake_api.symbols = list(massive_fetcher.POPULAR_STOCKS)
+
+    results = {
+        'meta': {
+            'startedAt': started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': vars(args),
+        },
+    }
+
+    try:
+        if args.only in (None, 'micro'):
+            print("\nMicro-benchmarks")
+            results['micro'] = micro_benchmarks(args)
+        if args.only in (None, 'routes'):
+            print("\nRoute benchmarks")
+            results['routes'] = route_benchmarks(args)
+    finally:
+        fake_api.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results['fakeApi'] = fake_api.stats()
+    results['peakRssMb'] = peak_rss_mb()
+
+    for section in ('micro', 'routes'):
+        if section in results:
+            print_table(section.capitalize(), results[section])
+    print(f"\nPeak RSS: {results['peakRssMb']['self']} MB (children {results['peakRssMb']['children']} MB), "
+          f"fake API requests: {results['fakeApi']['requests']} ({results['fakeApi']['throttled']} throttled)")
+
+    out = args.out or os.path.join(DEFAULT_RESULTS_DIR, f"{started_at.replace(':', '-')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
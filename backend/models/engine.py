@@ -0,0 +1,794 @@
+"""
+Concurrent Prediction Engine
+Runs LSTM training/inference jobs on a bounded pool of worker processes so
+concurrent predictions never share model or scaler state
+"""
+
+import contextvars
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.forecasters import DEFAULT_ENGINE, FORECASTERS
+from models.prediction_cache import prediction_cache
+from models.predictor import TRAINING_PERIOD, stock_predictor
+from utils.metrics import capture, metrics, request_timings
+from utils.rate_limiter import PRIORITY_BACKGROUND, priority_scope
+from utils.structured_log import get_logger
+
+log = get_logger('engine')
+
+PREDICTION_CACHE_LOOKUPS = metrics.counter(
+    'prediction_cache_lookups',
+    'Forecast lookups answered from the prediction cache (hit), an in-flight job (shared) or a new job (miss)',
+    ('result',),
+)
+
+# Predictor used inside each worker (one per process)
+_worker_predictor = None
+
+
+def _init_worker(tf_threads):
+    """Limit TensorFlow's thread pools so workers don't oversubscribe the CPU"""
+    if tf_threads:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _get_worker_predictor(settings):
+    global _worker_predictor
+    if _worker_predictor is None:
+        from models.predictor import StockPredictor
+        _worker_predictor = StockPredictor()
+
+    for name, value in settings.items():
+        setattr(_worker_predictor, name, value)
+    return _worker_predictor
+
+
+def _event_progress(events, token):
+    """Progress callback putting events on the queue tagged with the job token"""
+    if events is None:
+        return None
+
+    def progress(stage, **info):
+        events.put((token, stage, info))
+    return progress
+
+
+def _warm_worker(settings):
+    """Worker entry point: load the ML stack ahead of the first prediction"""
+    _get_worker_predictor(settings).warm_up()
+    return os.getpid()
+
+
+def _run_forecast(symbol, historical_data, days, samples, settings, events=None, token=None):
+    """
+    Worker entry point: forecast one symbol with job-local model state
+
+    Progress events (training epochs, inference start) are put on the
+    events queue tagged with the job token.
+    """
+    predictor = _get_worker_predictor(settings)
+    with capture() as observations:
+        result = predictor.forecast(
+            symbol, historical_data, days, progress=_event_progress(events, token), samples=samples
+        )
+    return result, observations
+
+
+def _run_universe_forecast(histories, days, symbols, universe, samples, settings, events=None, token=None):
+    """Worker entry point: forecast symbols with the shared universe model"""
+    from models.universe import UniverseModel
+
+    model = UniverseModel(_get_worker_predictor(settings))
+    with capture() as observations:
+        result = model.forecast_all(
+            histories, days, symbols, universe, progress=_event_progress(events, token), samples=samples
+        )
+    return result, observations
+
+
+class PredictionEngine:
+    """
+    Bounded pool of prediction workers
+
+    History is fetched in the calling thread (so the shared rate limiter and
+    bar store stay in this process); training and inference run in the pool.
+    """
+
+    def __init__(self, workers=None, pool=None, tf_threads=None, predictor=None, cache=None):
+        cpu_count = os.cpu_count() or 1
+        self.predictor = predictor or stock_predictor
+        self.cache = cache or prediction_cache
+        # Forecasts are computed this far out and sliced, so later requests
+        # for any shorter horizon are cache hits
+        self.cache_horizon = int(os.getenv('PREDICTION_CACHE_HORIZON', 30))
+        self.workers = workers or int(os.getenv('PREDICTION_WORKERS', max(1, min(4, cpu_count // 2))))
+        # 'process' (default) or 'thread'
+        self.pool = pool or os.getenv('PREDICTION_POOL', 'process')
+        self.tf_threads = tf_threads or int(os.getenv('PREDICTION_TF_THREADS', max(1, cpu_count // self.workers)))
+        # Concurrent history fetches for batch predictions (still bound by the rate limiter)
+        self.fetch_workers = int(os.getenv('PREDICTION_FETCH_WORKERS', 4))
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # In-flight forecasts by cache key, shared by concurrent identical requests
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self.shared_forecasts = 0
+
+        # Progress events from workers, routed to listeners by job token
+        self._events = None
+        self._manager = None
+        self._listeners = {}
+
+        # Warm-up state: 'cold', 'warming', 'ready' or 'failed'
+        self._warm_state = 'cold'
+        self._warm_error = None
+        self._warmup_ms = None
+        self._warm_thread = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.pool == 'thread':
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='predict'
+                    )
+                else:
+                    # spawn: forking a process that already loaded TensorFlow can deadlock
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self.tf_threads,)
+                    )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            # Replacement workers load the ML stack again
+            if self._warm_state == 'ready':
+                self._warm_state = 'cold'
+
+    def warm_up(self, wait=False):
+        """
+        Start the worker pool and load TensorFlow in every worker
+
+        Runs in a background thread so the server can answer health checks
+        (and quote requests) while the ML stack loads.
+
+        Parameters:
+        - wait: Block until warm-up has finished
+
+        Returns:
+        - Current readiness (see readiness())
+        """
+        with self._lock:
+            start = self._warm_state in ('cold', 'failed')
+            if start:
+                self._warm_state = 'warming'
+                self._warm_error = None
+                self._warm_thread = threading.Thread(
+                    target=self._warm_up, name='predict-warmup', daemon=True
+                )
+                self._warm_thread.start()
+
+        if wait and self._warm_state == 'warming':
+            self._warm_thread.join()
+        return self.readiness()
+
+    def _warm_up(self):
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            settings = self.settings()
+            # One job per worker; each takes seconds, so every worker gets one
+            futures = [executor.submit(_warm_worker, settings) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+            state, error = 'ready', None
+        except Exception as e:
+            log.error("Prediction engine warm-up failed", extra={'error': str(e)})
+            state, error = 'failed', str(e)
+
+        with self._lock:
+            self._warm_state = state
+            self._warm_error = error
+            self._warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        if state == 'ready':
+            log.info("Prediction engine warm", extra={'warmup_ms': self._warmup_ms})
+
+    def _mark_ready(self, future):
+        """A finished worker job proves the ML stack is loaded"""
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                if self._warm_state == 'cold':
+                    self._warm_state = 'ready'
+
+    def readiness(self):
+        """Whether LSTM predictions can run without loading TensorFlow first"""
+        with self._lock:
+            return {
+                'ready': self._warm_state == 'ready',
+                'state': self._warm_state,
+                'warmupMs': self._warmup_ms,
+                'error': self._warm_error,
+            }
+
+    def _get_events(self):
+        """Queue workers report progress on (created with its dispatcher on first use)"""
+        with self._lock:
+            if self._events is None:
+                if self.pool == 'thread':
+                    self._events = queue.Queue()
+                else:
+                    self._manager = multiprocessing.get_context('spawn').Manager()
+                    self._events = self._manager.Queue()
+                threading.Thread(
+                    target=self._dispatch_events, name='predict-events', daemon=True
+                ).start()
+            return self._events
+
+    def _dispatch_events(self):
+        events = self._events
+        while True:
+            try:
+                token, stage, info = events.get()
+            except (EOFError, OSError):
+                return
+
+            listener = self._listeners.get(token)
+            if listener:
+                try:
+                    listener(stage, **info)
+                except Exception as e:
+                    log.warning("Progress listener failed", extra={'error': str(e)})
+
+    def settings(self):
+        """Predictor settings forwarded to workers"""
+        return {
+            'sequence_length': self.predictor.sequence_length,
+            'epochs': self.predictor.epochs,
+            'batch_size': self.predictor.batch_size,
+            'mode': self.predictor.mode,
+            'horizon': self.predictor.horizon,
+            'fine_tune_epochs': self.predictor.fine_tune_epochs,
+            'max_fine_tunes': self.predictor.max_fine_tunes,
+            'max_new_bars': self.predictor.max_new_bars,
+            'drift_threshold': self.predictor.drift_threshold,
+            'scale_tolerance': self.predictor.scale_tolerance,
+            'interval_samples': self.predictor.interval_samples,
+        }
+
+    def interval_samples(self, samples, engine=DEFAULT_ENGINE):
+        """Monte Carlo samples a forecast will draw (None: the predictor default; 0 for NumPy engines)"""
+        if engine in FORECASTERS:
+            return 0
+        return self.predictor.interval_samples if samples is None else samples
+
+    def submit(self, symbol, historical_data, days=7, progress=None, engine=DEFAULT_ENGINE, samples=None):
+        """
+        Queue a forecast for already fetched history
+
+        NumPy engines take milliseconds, so they run right here instead of
+        paying for a round trip to the worker pool.
+
+        Parameters:
+        - progress: Optional callback progress(stage, **info) receiving the
+          worker's training epoch and inference events
+        - engine: 'lstm' or one of the NumPy engines in models.forecasters
+        - samples: Monte Carlo dropout samples for prediction intervals
+          (None: PREDICTION_INTERVAL_SAMPLES, 0: none)
+
+        Returns:
+        - Future resolving to the prediction dict (or None)
+        """
+        if engine in FORECASTERS:
+            # No training stage; callers already announced 'inferring'
+            future = Future()
+            future.set_result(self.predictor.forecast(symbol, historical_data, days, engine=engine))
+            return future
+
+        return self._submit(
+            _run_forecast, (symbol, historical_data, days, self.interval_samples(samples, engine)), progress
+        )
+
+    def _submit(self, fn, args, progress=None):
+        """
+        Queue a worker function, routing its progress events to the callback
+
+        Worker functions return (result, observations); the observations are
+        replayed into this process's metrics (and the submitting request's
+        Server-Timing) before the returned future resolves to the result.
+        """
+        executor = self._get_executor()
+
+        def run(*call):
+            if self.pool == 'thread':
+                # Thread workers record stage timings into the submitting request directly
+                return executor.submit(contextvars.copy_context().run, *call)
+            return executor.submit(*call)
+
+        if progress is None:
+            inner = run(fn, *args, self.settings())
+        else:
+            token = uuid.uuid4().hex
+            self._listeners[token] = progress
+            inner = run(fn, *args, self.settings(), self._get_events(), token)
+            inner.add_done_callback(lambda _: self._listeners.pop(token, None))
+
+        inner.add_done_callback(self._mark_ready)
+
+        timings = request_timings()
+        outer = Future()
+
+        def unwrap(done):
+            if outer.cancelled():
+                # The caller gave up (e.g. timed out) after the worker started
+                return
+            if done.cancelled():
+                outer.cancel()
+                return
+            error = done.exception()
+            if error is not None:
+                outer.set_exception(error)
+                return
+            result, observations = done.result()
+            metrics.replay(observations, timings)
+            outer.set_result(result)
+
+        outer.add_done_callback(lambda done: done.cancelled() and inner.cancel())
+        inner.add_done_callback(unwrap)
+        return outer
+
+    def forecast(self, symbol, historical_data, days=7, progress=None, engine=DEFAULT_ENGINE, samples=None):
+        """
+        Forecast already fetched history, served from the prediction cache when possible
+
+        On a miss the forecast is computed for max(days, cache_horizon) days
+        and cached; the returned result is sliced to `days`. Forecasts with
+        different interval samples are cached separately.
+
+        Returns:
+        - Future resolving to the prediction dict (or None)
+        """
+        samples = self.interval_samples(samples, engine)
+        key = self.predictor.cache_key(symbol, historical_data, engine, samples)
+        cached = self.cache.get(key, days)
+        if cached is not None:
+            PREDICTION_CACHE_LOOKUPS.inc(result='hit')
+            future = Future()
+            future.set_result(self.predictor.slice_result(cached, days))
+            return future
+
+        inner = self._join_flight(key, symbol, historical_data, days, progress, engine, samples)
+        outer = Future()
+
+        def resolve(done):
+            if outer.cancelled():
+                return
+            if done.cancelled():
+                outer.cancel()
+                return
+            error = done.exception()
+            if error is not None:
+                outer.set_exception(error)
+                return
+            result = done.result()
+            self.cache.put(key, result)
+            outer.set_result(self.predictor.slice_result(result, days) if result else result)
+
+        # Cancelling the returned future (e.g. on a batch timeout) cancels the
+        # job once no other request is waiting on it
+        outer.add_done_callback(lambda done: done.cancelled() and self._leave_flight(key, inner))
+        inner.add_done_callback(resolve)
+        return outer
+
+    def _join_flight(self, key, symbol, historical_data, days, progress, engine, samples):
+        """
+        Future of the in-flight forecast for this key, submitting one if needed
+
+        Concurrent requests for the same symbol, model version and close share
+        one worker job (one training) as long as it covers their horizon.
+        """
+        horizon = max(days, self.cache_horizon) if self.cache.enabled else days
+        if engine in FORECASTERS:
+            PREDICTION_CACHE_LOOKUPS.inc(result='miss')
+            # Computed inline in milliseconds; nothing worth sharing
+            return self.submit(symbol, historical_data, horizon, progress, engine, samples)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight['horizon'] >= days and not flight['future'].done():
+                flight['waiters'] += 1
+                self.shared_forecasts += 1
+                PREDICTION_CACHE_LOOKUPS.inc(result='shared')
+                return flight['future']
+
+            PREDICTION_CACHE_LOOKUPS.inc(result='miss')
+            future = self.submit(symbol, historical_data, horizon, progress, engine, samples)
+            if not future.done():
+                self._flights[key] = {'future': future, 'horizon': horizon, 'waiters': 1}
+                future.add_done_callback(lambda done: self._end_flight(key, done))
+            return future
+
+    def _end_flight(self, key, future):
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight['future'] is future:
+                del self._flights[key]
+
+    def _leave_flight(self, key, future):
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight['future'] is future:
+                flight['waiters'] -= 1
+                if flight['waiters'] > 0:
+                    return
+        future.cancel()
+
+    def _forecast_stage(self, symbol, historical_data, engine=DEFAULT_ENGINE):
+        """Stage a forecast starts in: 'inferring' when no training or fine-tuning is needed"""
+        if engine in FORECASTERS or self.predictor.has_stored_model(symbol, historical_data):
+            return 'inferring'
+        return 'training'
+
+    def predict(self, symbol, days=7, fetcher=None, timeout=None, progress=None, engine=DEFAULT_ENGINE, samples=None):
+        """
+        Fetch history and run a forecast on the worker pool
+
+        Parameters:
+        - symbol: Stock symbol
+        - days: Number of days to predict
+        - fetcher: Massive API fetcher instance
+        - timeout: Max seconds to wait for the worker
+        - progress: Optional callback progress(stage, symbol, **info) for
+          'fetching', 'training' (with per-epoch info) and 'inferring'
+        - engine: 'lstm' or one of the NumPy engines in models.forecasters
+        - samples: Monte Carlo dropout samples for prediction intervals
+          (None: PREDICTION_INTERVAL_SAMPLES, 0: none)
+
+        Returns:
+        - Dictionary with predictions and confidence, or None
+        """
+        if progress:
+            progress('fetching', symbol)
+        historical_data = self.predictor.fetch_history(symbol, fetcher)
+        if historical_data is None:
+            return None
+
+        if progress:
+            progress(self._forecast_stage(symbol, historical_data, engine), symbol)
+
+        worker_progress = None
+        if progress:
+            def worker_progress(stage, **info):
+                progress(stage, symbol, **info)
+
+        try:
+            return self.forecast(symbol, historical_data, days, worker_progress, engine, samples).result(timeout)
+        except BrokenProcessPool:
+            log.error("Prediction worker crashed, restarting pool", extra={'symbol': symbol})
+            self._reset_executor()
+            return None
+
+    def start_fetches(self, symbols, fetcher=None, progress=None, fetch_ms=None):
+        """
+        Start fetching training histories at background rate limit priority
+
+        A fetcher with an async client (MassiveStockFetcher) runs every request
+        concurrently, up to MASSIVE_CONCURRENCY at a time; other fetchers use
+        a pool of fetch_workers threads.
+
+        Parameters:
+        - symbols: List of stock symbols
+        - progress: Optional callback progress('fetching', symbol)
+        - fetch_ms: Optional dict filled with symbol -> fetch time in milliseconds
+
+        Returns:
+        - Dictionary of future -> symbol; futures resolve to bar arrays or None
+        """
+        if fetcher is None:
+            from utils.massive_api import massive_fetcher
+            fetcher = massive_fetcher
+
+        client = getattr(fetcher, 'async_client', None)
+        fetch_pool = None
+        if client is None:
+            fetch_pool = ThreadPoolExecutor(max_workers=max(1, min(self.fetch_workers, len(symbols))))
+
+        def fetch(symbol):
+            with priority_scope(PRIORITY_BACKGROUND):
+                return self.predictor.fetch_history(symbol, fetcher)
+
+        def timed(inner, symbol, started):
+            # Resolves only after the fetch time is recorded
+            outer = Future()
+
+            def done(future):
+                if outer.cancelled():
+                    # The caller gave up (batch deadline); nothing to deliver
+                    return
+                if fetch_ms is not None:
+                    fetch_ms[symbol] = round((time.perf_counter() - started) * 1000, 1)
+                error = future.exception() if not future.cancelled() else RuntimeError('Fetch cancelled')
+                if error is not None:
+                    outer.set_exception(error)
+                else:
+                    outer.set_result(future.result())
+            inner.add_done_callback(done)
+            return outer
+
+        fetches = {}
+        with priority_scope(PRIORITY_BACKGROUND):
+            for symbol in symbols:
+                if progress:
+                    progress('fetching', symbol)
+                started = time.perf_counter()
+                if client is not None:
+                    future = client.submit('get_historical_bars', symbol, TRAINING_PERIOD, '1d')
+                else:
+                    future = fetch_pool.submit(fetch, symbol)
+                fetches[timed(future, symbol, started)] = symbol
+
+        if fetch_pool is not None:
+            fetch_pool.shutdown(wait=False)
+        return fetches
+
+    def fetch_histories(self, symbols, fetcher=None, progress=None):
+        """
+        Fetch training histories concurrently at background rate limit priority
+
+        Parameters:
+        - symbols: List of stock symbols
+        - progress: Optional callback progress('fetching', symbol)
+
+        Returns:
+        - (histories, fetch_ms): symbol -> bar array (None when unavailable)
+          and symbol -> fetch time in milliseconds
+        """
+        histories, fetch_ms = {}, {}
+        for future, symbol in self.start_fetches(symbols, fetcher, progress, fetch_ms).items():
+            histories[symbol] = self._fetch_result(symbol, future)
+
+        return histories, fetch_ms
+
+    def _fetch_result(self, symbol, future):
+        """Validated history from a fetch future (None when unavailable)"""
+        try:
+            historical_data = future.result()
+            return self.predictor.check_history(historical_data)
+        except Exception as e:
+            log.error("Error fetching history", extra={'symbol': symbol, 'error': str(e)})
+            return None
+
+    def predict_universe(self, symbols=None, days=7, fetcher=None, timeout=None, progress=None, samples=None):
+        """
+        Forecast with the shared cross-symbol model
+
+        The model is trained once on every symbol in the universe (and reused
+        until a new bar arrives); all requested symbols are then predicted in
+        a single batched inference call on the worker pool.
+
+        Parameters:
+        - symbols: Symbols to return (default: the whole universe)
+        - days: Number of days to predict
+        - fetcher: Massive API fetcher instance
+        - timeout: Max seconds to wait for the worker
+        - progress: Optional callback progress(stage, symbol, **info); the
+          model-wide 'training' and 'inferring' stages use symbol None
+        - samples: Monte Carlo dropout samples per symbol for prediction
+          intervals (None: PREDICTION_INTERVAL_SAMPLES, 0: none)
+
+        Returns:
+        - List of per-symbol results in request order (same shape as predict_many)
+        """
+        if fetcher is None:
+            from utils.massive_api import massive_fetcher
+            fetcher = massive_fetcher
+
+        universe = list(fetcher.POPULAR_STOCKS)
+        symbols = list(dict.fromkeys(symbols or universe))
+        results = {symbol: {'symbol': symbol, 'success': False, 'timings': {}} for symbol in symbols}
+
+        # The model always trains on the full universe; extra symbols are only inferred
+        histories, fetch_ms = self.fetch_histories(
+            list(dict.fromkeys(universe + symbols)), fetcher, progress
+        )
+        for symbol in symbols:
+            results[symbol]['timings']['fetchMs'] = fetch_ms.get(symbol)
+        histories = {symbol: history for symbol, history in histories.items() if history is not None}
+
+        if not histories:
+            for result in results.values():
+                result['error'] = 'Insufficient historical data'
+            return [results[symbol] for symbol in symbols]
+
+        worker_progress = None
+        if progress:
+            from models.universe import UniverseModel
+            stored = UniverseModel(self.predictor).has_stored_model({
+                symbol: history for symbol, history in histories.items() if symbol in universe
+            })
+            progress('inferring' if stored else 'training', None)
+
+            def worker_progress(stage, **info):
+                progress(stage, None, **info)
+
+        started = time.perf_counter()
+        try:
+            predictions = self._submit(
+                _run_universe_forecast, (histories, days, symbols, universe, self.interval_samples(samples)),
+                worker_progress
+            ).result(timeout)
+        except BrokenProcessPool:
+            log.error("Prediction worker crashed, restarting pool", extra={'symbol': 'universe'})
+            self._reset_executor()
+            predictions = {}
+        except TimeoutError:
+            predictions = {}
+            for result in results.values():
+                result['error'] = 'Timed out'
+        predict_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        for symbol in symbols:
+            result = results[symbol]
+            result['timings']['predictMs'] = predict_ms
+            prediction = predictions.get(symbol)
+            if prediction:
+                result['success'] = True
+                result['data'] = prediction
+            elif symbol not in histories:
+                result['error'] = 'Insufficient historical data'
+            else:
+                result.setdefault('error', 'Unable to generate prediction')
+            if progress:
+                progress('done', symbol, result=result)
+
+        return [results[symbol] for symbol in symbols]
+
+    def _remaining(self, deadline):
+        """Seconds left until a monotonic deadline (None: no deadline)"""
+        return None if deadline is None else max(0, deadline - time.monotonic())
+
+    def _time_out(self, result, progress=None):
+        """Fail a per-symbol batch result that missed the batch deadline"""
+        result['error'] = 'Timed out'
+        if progress:
+            progress('done', result['symbol'], result=result)
+
+    def predict_many(self, symbols, days=7, fetcher=None, timeout=None, progress=None, engine=DEFAULT_ENGINE,
+                     samples=None):
+        """
+        Predict several symbols in parallel
+
+        History fetches run concurrently at background rate limit priority and
+        each symbol is handed to the worker pool as soon as its data arrives.
+
+        Parameters:
+        - symbols: List of stock symbols (duplicates are predicted once)
+        - days: Number of days to predict
+        - fetcher: Massive API fetcher instance
+        - timeout: Max seconds for the whole batch, history fetches included;
+          symbols not finished by then fail with 'Timed out'
+        - progress: Optional callback progress(stage, symbol, **info), also
+          called with stage 'done' and result=<per-symbol result> as each
+          symbol finishes
+        - engine: 'lstm' or one of the NumPy engines in models.forecasters
+        - samples: Monte Carlo dropout samples for prediction intervals
+          (None: PREDICTION_INTERVAL_SAMPLES, 0: none)
+
+        Returns:
+        - List of per-symbol results in request order:
+          {'symbol', 'success', 'data' | 'error', 'timings': {'fetchMs', 'predictMs'}}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = {symbol: {'symbol': symbol, 'success': False, 'timings': {}} for symbol in symbols}
+
+        fetch_ms = {}
+        fetches = self.start_fetches(symbols, fetcher, progress, fetch_ms)
+
+        pending = {}
+        try:
+            for future in as_completed(fetches, timeout=self._remaining(deadline)):
+                symbol = fetches[future]
+                results[symbol]['timings']['fetchMs'] = fetch_ms.get(symbol)
+                try:
+                    historical_data = self.predictor.check_history(future.result())
+                except Exception as e:
+                    historical_data = None
+                    results[symbol]['error'] = f"Error fetching history: {str(e)}"
+
+                if historical_data is None:
+                    results[symbol].setdefault('error', 'Insufficient historical data')
+                    if progress:
+                        progress('done', symbol, result=results[symbol])
+                    continue
+
+                worker_progress = None
+                if progress:
+                    progress(self._forecast_stage(symbol, historical_data, engine), symbol)
+
+                    def worker_progress(stage, _symbol=symbol, **info):
+                        progress(stage, _symbol, **info)
+
+                future = self.forecast(symbol, historical_data, days, worker_progress, engine, samples)
+                pending[future] = (symbol, time.perf_counter())
+        except TimeoutError:
+            # Histories still downloading at the deadline are abandoned
+            for future, symbol in fetches.items():
+                if not future.done():
+                    future.cancel()
+                    self._time_out(results[symbol], progress)
+
+        try:
+            for future in as_completed(pending, timeout=self._remaining(deadline)):
+                symbol, submitted = pending[future]
+                result = results[symbol]
+                result['timings']['predictMs'] = round((time.perf_counter() - submitted) * 1000, 1)
+                try:
+                    prediction = future.result()
+                except BrokenProcessPool:
+                    log.error("Prediction worker crashed, restarting pool", extra={'symbol': symbol})
+                    self._reset_executor()
+                    prediction = None
+                    result['error'] = 'Prediction worker crashed'
+                except Exception as e:
+                    prediction = None
+                    result['error'] = str(e)
+
+                if prediction:
+                    result['success'] = True
+                    result['data'] = prediction
+                else:
+                    result.setdefault('error', 'Unable to generate prediction')
+                if progress:
+                    progress('done', symbol, result=result)
+        except TimeoutError:
+            for future, (symbol, _) in pending.items():
+                if not future.done():
+                    future.cancel()
+                    self._time_out(results[symbol], progress)
+
+        return [results[symbol] for symbol in symbols]
+
+    def stats(self):
+        """Pool configuration"""
+        return {
+            'pool': self.pool,
+            'workers': self.workers,
+            'tfThreads': self.tf_threads,
+            'fetchWorkers': self.fetch_workers,
+            'state': self._warm_state,
+            'cache': self.cache.stats(),
+            'sharedForecasts': self.shared_forecasts,
+        }
+
+    def shutdown(self):
+        """Stop all workers"""
+        self._reset_executor()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._events = None
+
+
+# Create global engine instance
+prediction_engine = PredictionEngine()
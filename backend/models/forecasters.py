@@ -0,0 +1,126 @@
+"""
+Lightweight Forecasting Engines
+Pure NumPy forecasters for quick directional signals; they fit on every
+request in milliseconds and never load TensorFlow
+"""
+
+import numpy as np
+
+# Engine used when a request doesn't choose one
+DEFAULT_ENGINE = 'lstm'
+
+
+class RidgeForecaster:
+    """
+    Lagged ridge regression on daily log returns
+
+    The next return is a linear function of the previous `lags` returns;
+    forecasts feed each predicted return back in as the newest lag.
+    """
+
+    def __init__(self, lags=10, alpha=1.0, max_history=250):
+        self.lags = lags
+        # Penalty relative to the average lag variance (returns are tiny, so
+        # an absolute penalty would depend on the stock's volatility)
+        self.alpha = alpha
+        # Only the most recent bars are fitted so old regimes don't dominate
+        self.max_history = max_history
+
+    def forecast(self, prices, days):
+        """
+        Forecast future prices
+
+        Parameters:
+        - prices: float array of closing prices, oldest first
+        - days: Number of days to predict
+
+        Returns:
+        - float64 array of predicted prices
+        """
+        prices = np.asarray(prices[-self.max_history:], dtype=np.float64)
+        returns = np.diff(np.log(prices))
+        if len(returns) <= self.lags:
+            raise ValueError(f"Need more than {self.lags + 1} prices for ridge forecasting")
+
+        # Row i holds returns[i:i + lags] and predicts returns[i + lags]
+        X = np.lib.stride_tricks.sliding_window_view(returns[:-1], self.lags)
+        y = returns[self.lags:]
+
+        # Center instead of fitting an unpenalized intercept column
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        Xc = X - x_mean
+        gram = Xc.T @ Xc
+        penalty = self.alpha * np.trace(gram) / self.lags
+        weights = np.linalg.solve(gram + penalty * np.eye(self.lags), Xc.T @ (y - y_mean))
+        intercept = y_mean - x_mean @ weights
+
+        window = returns[-self.lags:].copy()
+        predicted = np.empty(days)
+        for i in range(days):
+            predicted[i] = intercept + window @ weights
+            window[:-1] = window[1:]
+            window[-1] = predicted[i]
+
+        return prices[-1] * np.exp(np.cumsum(predicted))
+
+
+class ETSForecaster:
+    """
+    Damped-trend exponential smoothing (Holt's method)
+
+    Smoothing parameters are picked from a small grid by one-step-ahead
+    squared error on the recent history.
+    """
+
+    def __init__(self, alphas=(0.2, 0.5, 0.8), betas=(0.05, 0.1, 0.3), phi=0.9, max_history=250):
+        self.alphas = alphas
+        self.betas = betas
+        # Trend damping so long horizons flatten out
+        self.phi = phi
+        self.max_history = max_history
+
+    def _smooth(self, prices, alpha, beta):
+        """Run the recursion for every (alpha, beta) pair at once"""
+        level = np.full(alpha.shape, prices[0])
+        trend = np.full(alpha.shape, prices[1] - prices[0])
+        sse = np.zeros(alpha.shape)
+        for price in prices[1:]:
+            expected = level + self.phi * trend
+            sse += (price - expected) ** 2
+            new_level = alpha * price + (1 - alpha) * expected
+            trend = beta * (new_level - level) + (1 - beta) * self.phi * trend
+            level = new_level
+        return level, trend, sse
+
+    def forecast(self, prices, days):
+        """
+        Forecast future prices
+
+        Parameters:
+        - prices: float array of closing prices, oldest first
+        - days: Number of days to predict
+
+        Returns:
+        - float64 array of predicted prices
+        """
+        prices = np.asarray(prices[-self.max_history:], dtype=np.float64)
+        if len(prices) < 3:
+            raise ValueError("Need at least 3 prices for exponential smoothing")
+
+        alpha, beta = np.meshgrid(self.alphas, self.betas)
+        level, trend, sse = self._smooth(prices, alpha.ravel(), beta.ravel())
+        best = np.argmin(sse)
+
+        # Damped trend: h-step forecast adds phi + phi^2 + ... + phi^h trends
+        damping = np.cumsum(self.phi ** np.arange(1, days + 1))
+        return level[best] + damping * trend[best]
+
+
+# Available NumPy engines by request name ('lstm' is handled by StockPredictor)
+FORECASTERS = {
+    'ridge': RidgeForecaster(),
+    'ets': ETSForecaster(),
+}
+
+ENGINES = (DEFAULT_ENGINE,) + tuple(FORECASTERS)
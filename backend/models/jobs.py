@@ -0,0 +1,141 @@
+"""
+Asynchronous Prediction Jobs
+In-process job queue so prediction requests can return a job id immediately
+and clients poll for the result
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.structured_log import get_logger
+
+log = get_logger('jobs')
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are queued or running"""
+
+
+class JobManager:
+    """
+    Runs jobs on a small thread pool and keeps their results for a TTL
+
+    Each job function receives a progress(stage, **info) callback as its first
+    argument and returns the job's result payload.
+    """
+
+    def __init__(self, workers=None, max_jobs=None, ttl=None):
+        self.workers = workers or int(os.getenv('PREDICTION_JOB_WORKERS', 4))
+        # Max jobs retained (queued, running and finished)
+        self.max_jobs = max_jobs or int(os.getenv('PREDICTION_JOB_LIMIT', 200))
+        # Seconds a finished job's result is kept
+        self.ttl = ttl or int(os.getenv('PREDICTION_JOB_TTL', 3600))
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue a job
+
+        Parameters:
+        - kind: Job type label (e.g. 'predict', 'predict_batch')
+        - fn: Callable fn(progress, *args, **kwargs) returning the result payload
+
+        Returns:
+        - Job snapshot dictionary (includes 'id')
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'stage': 'queued',
+            'progress': {},
+            'result': None,
+            'error': None,
+            'createdAt': datetime.now().isoformat(),
+            'startedAt': None,
+            'finishedAt': None,
+            '_finished': None,
+        }
+
+        with self._lock:
+            self._evict()
+            if len(self._jobs) >= self.max_jobs:
+                raise JobQueueFull(f"Too many prediction jobs in progress (limit {self.max_jobs})")
+            self._jobs[job_id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return self._snapshot(job)
+
+    def get(self, job_id):
+        """Job snapshot, or None if unknown or expired"""
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def stats(self):
+        """Job counts by status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+
+    def _run(self, job, fn, args, kwargs):
+        def progress(stage, **info):
+            with self._lock:
+                job['stage'] = stage
+                job['progress'].update(info)
+
+        with self._lock:
+            job['status'] = 'running'
+            job['startedAt'] = datetime.now().isoformat()
+
+        try:
+            result = fn(progress, *args, **kwargs)
+            status, error = 'completed', None
+        except Exception as e:
+            log.error("Job failed", extra={'job': job['id'], 'kind': job['kind'], 'error': str(e)})
+            result, status, error = None, 'failed', str(e)
+
+        with self._lock:
+            job['result'] = result
+            job['error'] = error
+            job['status'] = status
+            job['stage'] = 'done'
+            job['finishedAt'] = datetime.now().isoformat()
+            job['_finished'] = time.time()
+
+    def _evict(self):
+        """Drop expired results, then the oldest finished jobs if over the limit"""
+        now = time.time()
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job['_finished'] and now - job['_finished'] > self.ttl
+        ]:
+            del self._jobs[job_id]
+
+        if len(self._jobs) >= self.max_jobs:
+            finished = [job_id for job_id, job in self._jobs.items() if job['_finished']]
+            for job_id in finished[:len(self._jobs) - self.max_jobs + 1]:
+                del self._jobs[job_id]
+
+    def _snapshot(self, job):
+        return {
+            key: (dict(value) if isinstance(value, dict) else value)
+            for key, value in job.items()
+            if not key.startswith('_')
+        }
+
+
+# Create global job manager instance
+job_manager = JobManager()
@@ -0,0 +1,79 @@
+"""
+Prediction Result Cache
+Keeps the longest forecast computed per symbol and model version so
+requests for the same or a shorter horizon are answered by slicing it
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results
+
+    Entries are keyed on (symbol, engine, model fingerprint, last close), so
+    a new bar or a refreshed partial bar never serves a stale forecast.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv('PREDICTION_CACHE_SIZE', 256))
+        self.enabled = os.getenv('PREDICTION_CACHE', 'true').lower() == 'true'
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, days):
+        """
+        Cached result covering at least `days` days
+
+        Returns:
+        - Full cached result (slice it with slice_result), or None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None or len(result['allPredictions']) < days:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        """Store a result unless a longer horizon is already cached"""
+        if not self.enabled or not result:
+            return
+
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or len(current['allPredictions']) < len(result['allPredictions']):
+                self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Entry count and hit/miss counters"""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'enabled': self.enabled,
+            'entries': size,
+            'maxEntries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Create global prediction cache instance
+prediction_cache = PredictionCache()
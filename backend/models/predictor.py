@@ -4,58 +4,201 @@ Uses LSTM (Long Short-Term Memory) neural network for time series prediction
 """
 
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
 import sys
 import os
 
+# TensorFlow, Keras and scikit-learn are imported on first use so that
+# importing this module (e.g. in a quote-only server) stays cheap
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from models.forecasters import DEFAULT_ENGINE, FORECASTERS
+from models.registry import fingerprint, model_registry
+from utils.history_format import bar_dates
+from utils.metrics import metrics, stage
+from utils.single_flight import SingleFlight
+from utils.structured_log import get_logger
+
+# Bump when build_model changes so stored models are retrained
+MODEL_ARCHITECTURE_VERSION = 1
+
+# History period fetched for training
+TRAINING_PERIOD = '2y'
+
+# Percentile bands reported with Monte Carlo prediction intervals
+INTERVAL_PERCENTILES = (5, 25, 50, 75, 95)
+
+log = get_logger('predictor')
+
+TRAINING_EPOCHS = metrics.counter(
+    'prediction_training_epochs',
+    'Training epochs run, by full training or fine-tuning',
+    ('kind',),
+)
+PREDICTIONS = metrics.counter(
+    'predictions',
+    'Predictions generated by engine and how the model was obtained',
+    ('engine', 'update'),
+)
+
+def epoch_progress(progress, epochs):
+    """Keras callback reporting each finished training epoch to a progress callback"""
+    from tensorflow import keras
+    
+    class EpochProgress(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            progress(
+                'training',
+                epoch=epoch + 1,
+                epochs=epochs,
+                loss=float(logs.get('loss', 0)),
+                valLoss=float(logs.get('val_loss', 0))
+            )
+    
+    return EpochProgress()
+
 class StockPredictor:
-    """LSTM-based stock price predictor - Works with Massive API"""
+    """
+    LSTM-based stock price predictor - Works with Massive API
+    
+    Holds configuration only; every prediction builds or loads its own model
+    and scaler, so one instance can serve concurrent requests.
+    """
     
-    def __init__(self):
-        self.model = None
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
+    def __init__(self, registry=None):
         self.sequence_length = 30  # Use 30 days of data to predict next day
+        self.epochs = 15
+        self.batch_size = 32
+        # 'recursive': one-day model fed back into itself
+        # 'direct': one forward pass emits every day up to `horizon`
+        self.mode = os.getenv('PREDICTION_MODE', 'recursive')
+        self.horizon = 30
+        self.registry = registry or model_registry
         
-    def prepare_data(self, prices_array, prediction_days=60):
+        # Incremental updates: when new bars arrive, the stored model is
+        # fine-tuned on the new windows instead of retrained from scratch
+        self.fine_tune_epochs = int(os.getenv('FINE_TUNE_EPOCHS', 3))
+        # Full retrain after this many consecutive fine-tunes...
+        self.max_fine_tunes = int(os.getenv('FINE_TUNE_MAX_UPDATES', 20))
+        # ...or when more new bars than this arrived at once
+        self.max_new_bars = int(os.getenv('FINE_TUNE_MAX_BARS', 10))
+        # ...or when error on the new windows is this many times the recent error
+        self.drift_threshold = float(os.getenv('FINE_TUNE_DRIFT', 3.0))
+        # ...or when new prices fall this far outside the scaler's [0, 1] range
+        self.scale_tolerance = float(os.getenv('FINE_TUNE_SCALE_TOLERANCE', 0.1))
+        
+        # Default Monte Carlo dropout samples per forecast for prediction
+        # intervals (0 = off); requests can override it
+        self.interval_samples = int(os.getenv('PREDICTION_INTERVAL_SAMPLES', 0))
+        
+        # Concurrent identical predict_future calls share one fetch + training
+        self._flights = SingleFlight()
+    
+    def hyperparams(self):
+        """Training settings that identify a stored model"""
+        return {
+            'architecture': MODEL_ARCHITECTURE_VERSION,
+            'sequenceLength': self.sequence_length,
+            'epochs': self.epochs,
+            'batchSize': self.batch_size,
+            'mode': self.mode,
+            'horizon': self.output_days(),
+        }
+    
+    def output_days(self):
+        """Number of days the model emits per forward pass"""
+        return self.horizon if self.mode == 'direct' else 1
+    
+    def last_bar_date(self, historical_data):
+        """Date string of the newest bar (as stored in model metadata)"""
+        return bar_dates(historical_data['t'][-1:])[0]
+    
+    def model_fingerprint(self, historical_data):
+        """Registry fingerprint of a model trained on this history"""
+        return fingerprint(self.last_bar_date(historical_data), self.hyperparams())
+    
+    def cache_key(self, symbol, historical_data, engine=DEFAULT_ENGINE, samples=0):
+        """Prediction cache key: changes with the model version, the latest close and the interval samples"""
+        return (symbol, engine, self.model_fingerprint(historical_data), float(historical_data['c'][-1]), samples)
+    
+    def slice_result(self, result, days):
         """
-        Prepare data for LSTM model
+        Shorten a prediction to `days` days
         
-        Parameters:
-        - prices_array: Array of closing prices
-        - prediction_days: Number of days to use for prediction
+        The derived fields (tomorrow/threeDay/nextWeek, confidence, trend)
+        are recomputed from the sliced predictions.
         """
-        # Reshape prices
-        prices = np.array(prices_array).reshape(-1, 1)
+        if len(result['allPredictions']) == days:
+            return result
         
-        # Scale the data
-        scaled_data = self.scaler.fit_transform(prices)
+        intervals = result.get('intervals')
+        if intervals:
+            intervals = {
+                key: value[:days] if isinstance(value, list) else value
+                for key, value in intervals.items()
+            }
+        return self.build_result(
+            result['symbol'], result['currentPrice'], result['allPredictions'][:days],
+            result.get('engine', DEFAULT_ENGINE), result.get('model'), intervals
+        )
+    
+    def has_stored_model(self, symbol, historical_data):
+        """Whether a prediction on this history can skip training"""
+        return self.registry.meta(symbol).get('fingerprint') == self.model_fingerprint(historical_data)
+        
+    def extract_prices(self, historical_data):
+        """
+        Extract closing prices once into a float32 buffer
         
-        # Create sequences
-        X, y = [], []
+        Parameters:
+        - historical_data: Bar array (see utils.bar_store.BAR_DTYPE)
+        """
+        return historical_data['c'].astype(np.float32)
+    
+    def prepare_data(self, prices, prediction_days, scaler, horizon=1, fit=True):
+        """
+        Prepare data for LSTM model
         
-        for i in range(prediction_days, len(scaled_data)):
-            X.append(scaled_data[i-prediction_days:i, 0])
-            y.append(scaled_data[i, 0])
+        Windows are a strided view over the scaled price buffer, so no
+        per-window arrays are created.
         
-        X, y = np.array(X), np.array(y)
+        Parameters:
+        - prices: float32 array of closing prices
+        - prediction_days: Number of days to use for prediction
+        - scaler: MinMaxScaler to fit on the prices
+        - horizon: Number of following days each window predicts
+        - fit: False to reuse an already fitted scaler
         
-        # Reshape for LSTM [samples, time steps, features]
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        Returns:
+        - X: [samples, time steps, 1] view of the scaled prices
+        - y: [samples, horizon] view of the following scaled prices
+        """
+        with stage('prepare_data'):
+            # Scale the data (MinMaxScaler keeps float32)
+            transform = scaler.fit_transform if fit else scaler.transform
+            scaled = transform(prices.reshape(-1, 1)).ravel()
+            
+            # Window i covers scaled[i:i + prediction_days] and predicts the next `horizon` days
+            X = sliding_window_view(scaled[:len(scaled) - horizon], prediction_days)[..., np.newaxis]
+            y = sliding_window_view(scaled[prediction_days:], horizon)
         
         return X, y
     
-    def build_model(self, input_shape):
-        """Build LSTM model"""
+    def build_model(self, input_shape, outputs=1):
+        """
+        Build LSTM model
+        
+        Parameters:
+        - input_shape: (time steps, features)
+        - outputs: Days predicted per forward pass
+        """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        
         model = Sequential([
             # First LSTM layer
             LSTM(units=20, return_sequences=True, input_shape=input_shape),
@@ -71,57 +214,238 @@ class StockPredictor:
             
             # Output layer
             Dense(units=25),
-            Dense(units=1)
+            Dense(units=outputs)
         ])
         
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
     
-    def train_model(self, historical_data, epochs=25, batch_size=32):
+    def train_model(self, prices, epochs=25, batch_size=32, progress=None):
         """
-        Train the model on historical data from Massive API
+        Train a new model on closing prices
         
         Parameters:
-        - historical_data: List of dict from Massive API with 'close' prices
+        - prices: float32 array of closing prices (see extract_prices)
         - epochs: Number of training epochs
         - batch_size: Batch size for training
+        - progress: Optional callback progress(stage, **info) called after each epoch
+        
+        Returns:
+        - (model, scaler, message) tuple; model is None when training failed
         """
         try:
-            if not historical_data or len(historical_data) < self.sequence_length + 1:
-                return False, "Insufficient data for training. Need at least 61 days."
+            if prices is None or len(prices) < self.sequence_length + 1:
+                return None, None, "Insufficient data for training. Need at least 61 days."
             
-            # Extract closing prices from Massive API format
-            closing_prices = [float(item['close']) for item in historical_data]
+            from sklearn.preprocessing import MinMaxScaler
             
             # Prepare data
-            X, y = self.prepare_data(closing_prices, self.sequence_length)
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            X, y = self.prepare_data(prices, self.sequence_length, scaler, self.output_days())
             
             if len(X) < 50:  # Need minimum data for training
-                return False, f"Insufficient data after processing. Got {len(X)} samples, need at least 50."
+                return None, None, f"Insufficient data after processing. Got {len(X)} samples, need at least 50."
             
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, shuffle=False
-            )
+            model = self.fit_model(X, y, epochs, batch_size, progress)
             
-            # Build and train model
-            self.model = self.build_model((X_train.shape[1], 1))
+            return model, scaler, "Model trained successfully"
             
-            # Train with reduced verbosity
-            self.model.fit(
+        except Exception as e:
+            return None, None, f"Error training model: {str(e)}"
+    
+    def fit_model(self, X, y, epochs, batch_size, progress=None, validation=None):
+        """
+        Build and fit a model on prepared windows
+        
+        Parameters:
+        - X: [samples, time steps, 1] input windows in chronological order
+        - y: [samples, outputs] targets
+        - progress: Optional callback progress(stage, **info) called after each epoch
+        - validation: Optional (X_test, y_test); by default the last 20% of X is held out
+        """
+        if validation is None:
+            # Chronological 80/20 split (slices stay views)
+            split = len(X) - int(np.ceil(len(X) * 0.2))
+            X_train, X_test = X[:split], X[split:]
+            y_train, y_test = y[:split], y[split:]
+        else:
+            X_train, y_train = X, y
+            X_test, y_test = validation
+        
+        # Build and train model
+        model = self.build_model((X_train.shape[1], 1), outputs=y.shape[1])
+        
+        # Train with reduced verbosity
+        with stage('train'):
+            model.fit(
                 X_train, y_train,
                 epochs=epochs,
                 batch_size=batch_size,
                 validation_data=(X_test, y_test),
+                callbacks=[epoch_progress(progress, epochs)] if progress else None,
                 verbose=0
             )
+        TRAINING_EPOCHS.inc(epochs, kind='train')
+        
+        return model
+    
+    def new_bar_count(self, historical_data, last_bar_date):
+        """Number of bars newer than a stored model's last bar"""
+        if not last_bar_date:
+            return len(historical_data)
+        last_ms = datetime.strptime(last_bar_date, '%Y-%m-%d %H:%M:%S').timestamp() * 1000
+        return len(historical_data) - int(np.searchsorted(historical_data['t'], last_ms, side='right'))
+    
+    def retrain_reason(self, meta, model, scaler, prices, new_bars):
+        """
+        Check whether a stored model may be fine-tuned on its new bars
+        
+        Parameters:
+        - meta: Stored model metadata
+        - model, scaler: Stored model and its fitted scaler
+        - prices: float32 array of closing prices including the new bars
+        - new_bars: Number of bars since the model was last updated
+        
+        Returns:
+        - Reason a full retrain is needed, or None to fine-tune
+        """
+        if new_bars <= 0 or new_bars >= len(prices):
+            return 'history changed'
+        if new_bars > self.max_new_bars:
+            return f'{new_bars} new bars (limit {self.max_new_bars})'
+        if meta.get('fineTunes', 0) >= self.max_fine_tunes:
+            return f'{self.max_fine_tunes} fine-tunes since full training'
+        
+        # MinMaxScaler extrapolates badly far outside the range it was fitted on
+        scaled_new = scaler.transform(prices[-new_bars:].reshape(-1, 1))
+        if scaled_new.min() < -self.scale_tolerance or scaled_new.max() > 1 + self.scale_tolerance:
+            return 'prices outside scaler range'
+        
+        # Drift: error on the new windows vs the windows just before them
+        X, y = self.prepare_data(prices, self.sequence_length, scaler, self.output_days(), fit=False)
+        recent = new_bars + max(new_bars, 20)
+        if len(X) < recent:
+            return 'not enough history to measure drift'
+        predicted = model(X[-recent:], training=False).numpy()
+        errors = np.mean((predicted - y[-recent:]) ** 2, axis=1)
+        ratio = errors[-new_bars:].mean() / max(errors[:-new_bars].mean(), 1e-8)
+        if ratio > self.drift_threshold:
+            return f'drift (error x{ratio:.1f})'
+        
+        return None
+    
+    def fine_tune(self, model, scaler, prices, new_bars, progress=None):
+        """
+        Fine-tune a copy of a stored model on the windows ending in new bars
+        
+        The stored model is left untouched (it may be cached and in use).
+        
+        Returns:
+        - Updated model
+        """
+        from tensorflow import keras
+        
+        X, y = self.prepare_data(prices, self.sequence_length, scaler, self.output_days(), fit=False)
+        
+        tuned = keras.models.clone_model(model)
+        tuned.set_weights(model.get_weights())
+        tuned.compile(optimizer='adam', loss='mean_squared_error')
+        with stage('fine_tune'):
+            tuned.fit(
+                X[-new_bars:], y[-new_bars:],
+                epochs=self.fine_tune_epochs,
+                batch_size=self.batch_size,
+                callbacks=[epoch_progress(progress, self.fine_tune_epochs)] if progress else None,
+                verbose=0
+            )
+        TRAINING_EPOCHS.inc(self.fine_tune_epochs, kind='fine_tune')
+        return tuned
+    
+    def _update_model(self, symbol, historical_data, closing_prices, model_fp, progress=None):
+        """
+        Bring the symbol's model up to date with new bars
+        
+        Fine-tunes the stored model when the retrain policy allows it,
+        otherwise trains from scratch; the result is stored as a new version.
+        
+        Returns:
+        - (model, scaler, meta), or None when training failed
+        """
+        previous_meta = self.registry.meta(symbol)
+        previous = None
+        if previous_meta.get('hyperparams') == self.hyperparams():
+            previous = self.registry.load(symbol, previous_meta['fingerprint'])
+        
+        reason = 'no stored model'
+        if previous:
+            model, scaler, previous_meta = previous
+            new_bars = self.new_bar_count(historical_data, previous_meta.get('lastBarDate', ''))
+            reason = self.retrain_reason(previous_meta, model, scaler, closing_prices, new_bars)
+        
+        if reason is None:
+            log.info("Fine-tuning stored model", extra={'symbol': symbol, 'new_bars': new_bars})
+            model = self.fine_tune(model, scaler, closing_prices, new_bars, progress)
+            info = {
+                'update': 'fine-tuned',
+                'fineTunes': previous_meta.get('fineTunes', 0) + 1,
+                'fullTrainedAt': previous_meta.get('fullTrainedAt', previous_meta.get('trainedAt')),
+            }
+        else:
+            log.info("Training model", extra={'symbol': symbol, 'days': len(historical_data), 'reason': reason})
+            model, scaler, message = self.train_model(
+                closing_prices, epochs=self.epochs, batch_size=self.batch_size,
+                progress=progress
+            )
             
-            return True, "Model trained successfully"
+            if model is None:
+                log.warning("Training failed", extra={'symbol': symbol, 'reason': message})
+                return None
             
-        except Exception as e:
-            return False, f"Error training model: {str(e)}"
+            info = {
+                'update': 'trained',
+                'retrainReason': reason,
+                'fineTunes': 0,
+                'fullTrainedAt': datetime.now().isoformat(),
+            }
+        
+        meta = self.registry.save(symbol, model_fp, model, scaler, {
+            'lastBarDate': self.last_bar_date(historical_data),
+            'hyperparams': self.hyperparams(),
+            'version': previous_meta.get('version', 0) + 1,
+            **info,
+        })
+        return model, scaler, meta
+    
+    def model_info(self, meta, update):
+        """Model version and age reported with a prediction"""
+        trained_at = meta.get('trainedAt')
+        age_hours = None
+        if trained_at:
+            age_hours = round((datetime.now() - datetime.fromisoformat(trained_at)).total_seconds() / 3600, 2)
+        
+        return {
+            'version': meta.get('version', 1),
+            'fingerprint': meta.get('fingerprint'),
+            'update': update,
+            'lastBarDate': meta.get('lastBarDate'),
+            'trainedAt': trained_at,
+            'fullTrainedAt': meta.get('fullTrainedAt', trained_at),
+            'fineTunes': meta.get('fineTunes', 0),
+            'ageHours': age_hours,
+        }
     
-    def predict_future(self, symbol, days=7, fetcher=None):
+    def warm_up(self):
+        """
+        Load the ML stack and run one forward pass so the first real
+        prediction doesn't pay TensorFlow's import and graph setup cost
+        """
+        import sklearn.preprocessing  # noqa: F401
+        
+        model = self.build_model((self.sequence_length, 1), outputs=self.output_days())
+        window = np.zeros((1, self.sequence_length, 1), dtype=np.float32)
+        self._predict_scaled(model, window, 1)
+    
+    def predict_future(self, symbol, days=7, fetcher=None, engine=DEFAULT_ENGINE):
         """
         Predict future stock prices using Massive API data
         
@@ -129,9 +453,29 @@ class StockPredictor:
         - symbol: Stock symbol
         - days: Number of days to predict (default: 7)
         - fetcher: Massive API fetcher instance
+        - engine: 'lstm' or one of the NumPy engines in models.forecasters
         
         Returns:
-        - Dictionary with predictions and confidence
+        - Dictionary with predictions and confidence (shared with concurrent
+          identical calls; don't modify it)
+        """
+        return self._flights.do(
+            ('predict', symbol, days, engine), self._predict_future, symbol, days, fetcher, engine
+        )
+    
+    def _predict_future(self, symbol, days, fetcher, engine):
+        historical_data = self.fetch_history(symbol, fetcher)
+        if historical_data is None:
+            return None
+        return self.forecast(symbol, historical_data, days, engine=engine)
+    
+    def fetch_history(self, symbol, fetcher=None):
+        """
+        Fetch the training history for a symbol
+        
+        Returns:
+        - Bar array (see utils.bar_store.BAR_DTYPE), or None when there is
+          not enough data
         """
         try:
             if fetcher is None:
@@ -139,85 +483,292 @@ class StockPredictor:
                 from utils.massive_api import massive_fetcher
                 fetcher = massive_fetcher
             
-            print(f"Fetching historical data for {symbol}...")
-            
             # Get 2 years of historical data for training
-            historical_data = fetcher.get_historical_data(symbol, period='2y', interval='1d')
+            historical_data = fetcher.get_historical_bars(symbol, period=TRAINING_PERIOD, interval='1d')
             
-            if not historical_data or len(historical_data) < self.sequence_length + 1:
-                print(f"Insufficient historical data. Got {len(historical_data) if historical_data else 0} days.")
-                return None
+            return self.check_history(historical_data)
+        except Exception as e:
+            log.error("Error fetching history", extra={'symbol': symbol, 'error': str(e)})
+            return None
+    
+    def check_history(self, historical_data):
+        """
+        Validate a fetched training history
+        
+        Returns:
+        - The history, or None when there is not enough data
+        """
+        days = 0 if historical_data is None else len(historical_data)
+        if days < self.sequence_length + 1:
+            log.info("Insufficient historical data", extra={'days': days})
+            return None
+        
+        return historical_data
+    
+    def forecast(self, symbol, historical_data, days=7, progress=None, engine=DEFAULT_ENGINE, samples=None):
+        """
+        Predict future prices from already fetched history
+        
+        Parameters:
+        - symbol: Stock symbol
+        - historical_data: Bar array from fetch_history
+        - days: Number of days to predict
+        - progress: Optional callback progress(stage, **info) for training
+          epochs and the start of inference
+        - engine: 'lstm' or one of the NumPy engines in models.forecasters
+        - samples: Monte Carlo dropout samples for prediction intervals
+          (LSTM only; None uses interval_samples, 0 disables)
+        
+        Returns:
+        - Dictionary with predictions and confidence
+        """
+        try:
+            # Extract prices once for both training and inference
+            closing_prices = self.extract_prices(historical_data)
             
-            print(f"Got {len(historical_data)} days of data. Training model...")
+            if engine in FORECASTERS:
+                # NumPy engines fit on every call; no model is stored
+                if progress:
+                    progress('inferring')
+                with stage('inference'):
+                    predictions = [
+                        float(p) for p in FORECASTERS[engine].forecast(closing_prices, days)
+                    ]
+                PREDICTIONS.inc(engine=engine, update='fit')
+                return self.build_result(symbol, float(closing_prices[-1]), predictions, engine)
             
-            # Train model
-            success, message = self.train_model(historical_data, epochs=15)
+            # Reuse the stored model until a new bar arrives
+            model_fp = self.model_fingerprint(historical_data)
+            with stage('model_load'):
+                stored = self.registry.load(symbol, model_fp)
             
-            if not success:
-                print(f"Training failed: {message}")
-                return None
+            if stored:
+                log.debug("Using stored model", extra={'symbol': symbol, 'fingerprint': model_fp})
+                model, scaler, meta = stored
+                update = 'loaded'
+            else:
+                # Fine-tune the previous version on the new bars, or retrain
+                updated = self._update_model(symbol, historical_data, closing_prices, model_fp, progress)
+                if updated is None:
+                    return None
+                model, scaler, meta = updated
+                update = meta['update']
+                
+                log.info("Model updated", extra={'symbol': symbol, 'update': update, 'version': meta.get('version')})
             
-            print("Model trained successfully. Generating predictions...")
+            if progress:
+                progress('inferring')
             
-            # Get last 60 days for prediction
-            closing_prices = [float(item['close']) for item in historical_data]
-            last_60_days = closing_prices[-self.sequence_length:]
+            with stage('inference'):
+                # Get last window for prediction
+                last_window = closing_prices[-self.sequence_length:]
+                
+                # Scale last window
+                last_window_scaled = scaler.transform(last_window.reshape(-1, 1))
+                
+                # Predict future prices
+                current_sequence = last_window_scaled.reshape(1, self.sequence_length, 1).astype(np.float32)
+                predictions_scaled = self._predict_scaled(model, current_sequence, days)
+                predictions = [
+                    float(p) for p in scaler.inverse_transform(predictions_scaled.reshape(-1, 1)).ravel()
+                ]
+            PREDICTIONS.inc(engine=engine, update=update)
             
-            # Scale last 60 days
-            last_60_days_scaled = self.scaler.transform(np.array(last_60_days).reshape(-1, 1))
+            if samples is None:
+                samples = self.interval_samples
             
-            # Predict future prices
-            predictions = []
-            current_sequence = last_60_days_scaled.reshape(1, self.sequence_length, 1)
+            intervals = None
+            if samples > 0:
+                with stage('intervals'):
+                    sampled = self.sample_scaled_batch(model, current_sequence, days, samples)[0]
+                    intervals = self.prediction_intervals(
+                        scaler.inverse_transform(sampled.reshape(-1, 1)).reshape(sampled.shape)
+                    )
             
-            for _ in range(days):
-                # Predict next day
-                predicted_price_scaled = self.model.predict(current_sequence, verbose=0)
-                predicted_price = self.scaler.inverse_transform(predicted_price_scaled)[0][0]
-                predictions.append(float(predicted_price))
-                
-                # Update sequence for next prediction
-                new_sequence = np.append(current_sequence[0][1:], predicted_price_scaled)
-                current_sequence = new_sequence.reshape(1, self.sequence_length, 1)
+            return self.build_result(
+                symbol, float(closing_prices[-1]), predictions,
+                model_info=self.model_info(meta, update), intervals=intervals
+            )
             
+        except Exception as e:
+            log.exception("Error predicting", extra={'symbol': symbol, 'error': str(e)})
+            return None
+    
+    def build_result(self, symbol, current_price, predictions, engine=DEFAULT_ENGINE, model_info=None, intervals=None):
+        """
+        Build the prediction response from raw price predictions
+        
+        Parameters:
+        - symbol: Stock symbol
+        - current_price: Last closing price
+        - predictions: List of predicted prices, one per day
+        - engine: Name of the engine that produced the predictions
+        - model_info: Stored model version and age (see model_info)
+        - intervals: Percentile bands per day (see prediction_intervals);
+          when given, confidence is derived from their spread
+        """
+        if intervals:
+            confidence = self.interval_confidence(intervals, current_price)
+        else:
             # Calculate confidence (simplified - based on prediction variance)
-            current_price = float(closing_prices[-1])
             avg_prediction = np.mean(predictions[:3])  # Average of next 3 days
             price_diff_percent = abs((avg_prediction - current_price) / current_price * 100)
             
             # Confidence decreases as prediction differs more from current price
             confidence = max(50, min(95, 90 - price_diff_percent * 2))
-            
-            # Determine trend
-            if predictions[0] > current_price * 1.01:
-                trend = 'bullish'
-            elif predictions[0] < current_price * 0.99:
-                trend = 'bearish'
-            else:
-                trend = 'neutral'
-            
-            print(f"Predictions generated successfully. Trend: {trend}, Confidence: {confidence:.1f}%")
-            
-            return {
-                'symbol': symbol,
-                'currentPrice': round(current_price, 2),
-                'predictions': {
-                    'tomorrow': round(predictions[0], 2),
-                    'nextWeek': round(predictions[-1], 2) if len(predictions) >= 7 else round(predictions[-1], 2),
-                    'threeDay': round(np.mean(predictions[:3]), 2),
-                },
-                'allPredictions': [round(p, 2) for p in predictions],
-                'confidence': round(confidence, 1),
-                'trend': trend,
-                'recommendation': self._get_recommendation(trend, confidence),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            print(f"Error predicting for {symbol}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+        
+        # Determine trend
+        if predictions[0] > current_price * 1.01:
+            trend = 'bullish'
+        elif predictions[0] < current_price * 0.99:
+            trend = 'bearish'
+        else:
+            trend = 'neutral'
+        
+        log.debug("Predictions generated", extra={'symbol': symbol, 'trend': trend, 'confidence': round(confidence, 1)})
+        
+        result = {
+            'symbol': symbol,
+            'currentPrice': round(current_price, 2),
+            'predictions': {
+                'tomorrow': round(predictions[0], 2),
+                'nextWeek': round(predictions[-1], 2) if len(predictions) >= 7 else round(predictions[-1], 2),
+                'threeDay': round(np.mean(predictions[:3]), 2),
+            },
+            'allPredictions': [round(p, 2) for p in predictions],
+            'confidence': round(confidence, 1),
+            'trend': trend,
+            'recommendation': self._get_recommendation(trend, confidence),
+            'engine': engine,
+            'timestamp': datetime.now().isoformat()
+        }
+        if model_info:
+            result['model'] = model_info
+        if intervals:
+            result['intervals'] = intervals
+        return result
+    
+    def interval_confidence(self, intervals, current_price):
+        """
+        Confidence from the width of the 90% (p5-p95) band
+        
+        Every percentage point of average band width over the next 3 days
+        costs 5 points, so a 2% wide band gives 90 and a 10% wide band 50.
+        """
+        p5 = np.asarray(intervals['p5'][:3])
+        p95 = np.asarray(intervals['p95'][:3])
+        spread_percent = float(np.mean(p95 - p5)) / current_price * 100
+        return max(0.0, min(99.0, 100 - spread_percent * 5))
+    
+    def prediction_intervals(self, samples):
+        """
+        Percentile bands from Monte Carlo forecast samples
+        
+        Parameters:
+        - samples: Array [samples, days] of sampled prices
+        
+        Returns:
+        - Dictionary with 'samples' and one list per percentile ('p5' ...
+          'p95'), each with one price per forecast day
+        """
+        bands = np.percentile(samples, INTERVAL_PERCENTILES, axis=0)
+        intervals = {'samples': len(samples)}
+        for percentile, band in zip(INTERVAL_PERCENTILES, bands):
+            intervals[f'p{percentile}'] = np.round(band, 2).tolist()
+        return intervals
+    
+    def _predict_scaled(self, model, window, days):
+        """
+        Scaled predictions for the next `days` days from one input window
+        
+        Direct models emit the whole horizon in a single forward pass. One-day
+        models are rolled forward by a compiled graph loop instead of one
+        Keras predict call per day.
+        """
+        outputs = model.output_shape[-1]
+        if outputs > 1 and days > outputs:
+            raise ValueError(f"Model predicts at most {outputs} days, got {days}")
+        
+        import tensorflow as tf
+        
+        rollout = getattr(model, '_rollout', None)
+        if rollout is None:
+            # Kept on the model so it is freed together with it
+            rollout = model._rollout = self._compile_rollout(model)
+        return rollout(tf.constant(window), tf.constant(days)).numpy()[0]
+    
+    def predict_scaled_batch(self, model, windows, days):
+        """
+        Scaled predictions for many input windows in one batched call
+        
+        Parameters:
+        - windows: float32 array [batch, time steps, 1]
+        
+        Returns:
+        - Array [batch, days]
+        """
+        import tensorflow as tf
+        
+        rollout = getattr(model, '_rollout', None)
+        if rollout is None:
+            rollout = model._rollout = self._compile_rollout(model)
+        return rollout(tf.constant(windows), tf.constant(days)).numpy()
+    
+    def sample_scaled_batch(self, model, windows, days, samples):
+        """
+        Monte Carlo dropout forecasts for many input windows
+        
+        Each window is repeated `samples` times and the whole stack goes
+        through one rollout with dropout active, so every sample gets its
+        own dropout masks (at every recursive step) in a single batched
+        call instead of `samples` sequential predictions.
+        
+        Parameters:
+        - windows: float32 array [batch, time steps, 1]
+        - samples: Number of stochastic forecasts per window
+        
+        Returns:
+        - Array [batch, samples, days]
+        """
+        import tensorflow as tf
+        
+        rollout = getattr(model, '_sampling_rollout', None)
+        if rollout is None:
+            rollout = model._sampling_rollout = self._compile_rollout(model, training=True)
+        stacked = np.repeat(windows, samples, axis=0)
+        return rollout(tf.constant(stacked), tf.constant(days)).numpy().reshape(len(windows), samples, -1)
+    
+    def _compile_rollout(self, model, training=False):
+        """
+        Graph-compiled forecast function for a model
+        
+        With training=True dropout stays active (Monte Carlo sampling).
+        """
+        import tensorflow as tf
+        
+        # Any batch size (request-chosen sample counts) reuses one trace
+        signature = [
+            tf.TensorSpec([None, model.input_shape[1], 1], tf.float32),
+            tf.TensorSpec([], tf.int32),
+        ]
+        
+        if model.output_shape[-1] > 1:
+            # Direct model: the whole horizon comes out of one forward pass
+            @tf.function(input_signature=signature)
+            def forward(window, steps):
+                return model(window, training=training)[:, :steps]
+            return forward
+        
+        # One-day model: feed each prediction back into the window
+        @tf.function(input_signature=signature)
+        def rollout(window, steps):
+            outputs = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                next_value = model(window, training=training)
+                outputs = outputs.write(i, next_value[:, 0])
+                window = tf.concat([window[:, 1:, :], next_value[:, :, tf.newaxis]], axis=1)
+            return tf.transpose(outputs.stack())
+        return rollout
     
     def _get_recommendation(self, trend, confidence):
         """Get investment recommendation based on trend and confidence"""
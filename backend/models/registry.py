@@ -0,0 +1,148 @@
+"""
+Per-Symbol Model Registry
+Persists trained LSTM weights and the fitted MinMaxScaler so predictions
+reuse a model until new market data arrives
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.structured_log import get_logger
+
+log = get_logger('registry')
+
+DEFAULT_REGISTRY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'models'
+)
+
+
+def fingerprint(last_bar_date, hyperparams):
+    """
+    Fingerprint of a training run
+
+    Parameters:
+    - last_bar_date: Date of the newest bar the model was trained on
+    - hyperparams: Dictionary of training hyperparameters
+    """
+    payload = json.dumps({'lastBarDate': last_bar_date, **hyperparams}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Stores one trained model + scaler per symbol, on disk and in memory"""
+
+    def __init__(self, root=None, memory_size=None):
+        self.root = root or os.getenv('MODEL_REGISTRY_DIR', DEFAULT_REGISTRY_DIR)
+        # Number of loaded models kept in memory (LRU)
+        self.memory_size = memory_size or int(os.getenv('MODEL_REGISTRY_MEMORY', 8))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol)
+
+    def meta(self, symbol):
+        """Metadata of the symbol's current model, or {} if none is stored"""
+        try:
+            with open(os.path.join(self._dir(symbol), 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, symbol, fp):
+        """
+        Load the symbol's model if it matches the fingerprint
+
+        Returns:
+        - (model, scaler, meta) tuple, or None when missing or stale
+        """
+        with self._lock:
+            entry = self._memory.get(symbol)
+            if entry and entry[2].get('fingerprint') == fp:
+                self._memory.move_to_end(symbol)
+                return entry
+
+        meta = self.meta(symbol)
+        if meta.get('fingerprint') != fp:
+            return None
+
+        try:
+            # Imported here so reading registry metadata never loads TensorFlow
+            from tensorflow import keras
+
+            model = keras.models.load_model(
+                os.path.join(self._dir(symbol), f"{fp}.keras"), compile=False
+            )
+            with open(os.path.join(self._dir(symbol), f"{fp}.scaler.pkl"), 'rb') as f:
+                scaler = pickle.load(f)
+        except Exception as e:
+            log.warning("Could not load stored model", extra={'symbol': symbol, 'fingerprint': fp, 'error': str(e)})
+            return None
+
+        entry = (model, scaler, meta)
+        self._remember(symbol, entry)
+        return entry
+
+    def save(self, symbol, fp, model, scaler, info=None):
+        """
+        Store a trained model and scaler as the symbol's current version
+
+        Parameters:
+        - fp: Fingerprint from fingerprint()
+        - info: Extra metadata to record (hyperparameters, last bar date, ...)
+        """
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+
+        meta = {
+            'fingerprint': fp,
+            'trainedAt': datetime.now().isoformat(),
+            **(info or {}),
+        }
+
+        # Concurrent jobs may store the same symbol: write to unique temp
+        # names and rename, then switch the current version via meta.json
+        tmp_prefix = os.path.join(directory, f"tmp-{os.getpid()}-{threading.get_ident()}-")
+        try:
+            model.save(f"{tmp_prefix}{fp}.keras")
+            os.replace(f"{tmp_prefix}{fp}.keras", os.path.join(directory, f"{fp}.keras"))
+
+            with open(f"{tmp_prefix}{fp}.scaler.pkl", 'wb') as f:
+                pickle.dump(scaler, f)
+            os.replace(f"{tmp_prefix}{fp}.scaler.pkl", os.path.join(directory, f"{fp}.scaler.pkl"))
+
+            with open(f"{tmp_prefix}meta.json", 'w') as f:
+                json.dump(meta, f)
+            os.replace(f"{tmp_prefix}meta.json", os.path.join(directory, 'meta.json'))
+        except Exception as e:
+            log.error("Could not store model", extra={'symbol': symbol, 'fingerprint': fp, 'error': str(e)})
+            return meta
+
+        self._remember(symbol, (model, scaler, meta))
+        self._remove_old_versions(symbol, fp)
+        return meta
+
+    def _remember(self, symbol, entry):
+        with self._lock:
+            self._memory[symbol] = entry
+            self._memory.move_to_end(symbol)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _remove_old_versions(self, symbol, fp):
+        directory = self._dir(symbol)
+        for name in os.listdir(directory):
+            if name != 'meta.json' and not name.startswith((fp, 'tmp-')):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+# Create global registry instance
+model_registry = ModelRegistry()
@@ -0,0 +1,206 @@
+"""
+Shared Cross-Symbol Model
+One LSTM trained on normalized windows from every symbol in the universe,
+with per-symbol scalers, so all symbols are forecast in one batched pass
+"""
+
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictor import StockPredictor
+from models.registry import fingerprint, model_registry
+from utils.metrics import stage
+from utils.structured_log import get_logger
+
+# Registry entry holding the shared model
+UNIVERSE_KEY = '_universe'
+
+log = get_logger('universe')
+
+
+class UniverseModel:
+    """
+    Global model over many symbols
+
+    Each symbol's prices are scaled by its own MinMaxScaler, so windows from
+    a $20 and a $2000 stock share one [0, 1] range and one set of weights.
+    """
+
+    def __init__(self, predictor=None, registry=None):
+        self.predictor = predictor or StockPredictor()
+        self.registry = registry or model_registry
+
+    def hyperparams(self, symbols):
+        """Training settings that identify a stored universe model"""
+        return {
+            **self.predictor.hyperparams(),
+            'universe': sorted(symbols),
+        }
+
+    def model_fingerprint(self, histories):
+        """Registry fingerprint of a model trained on these histories"""
+        last_bar_date = self.last_bar_date(histories)
+        return fingerprint(last_bar_date, self.hyperparams(histories))
+
+    def last_bar_date(self, histories):
+        """Date string of the newest bar across all histories"""
+        return self.predictor.last_bar_date(max(histories.values(), key=lambda history: history['t'][-1]))
+
+    def has_stored_model(self, histories):
+        """Whether a stored model matches the histories (no training needed)"""
+        return self.registry.meta(UNIVERSE_KEY).get('fingerprint') == self.model_fingerprint(histories)
+
+    def train(self, prices, progress=None):
+        """
+        Train the shared model
+
+        Parameters:
+        - prices: Dictionary of symbol -> float32 closing prices
+        - progress: Optional callback progress(stage, **info) called after each epoch
+
+        Returns:
+        - (model, scalers) with one fitted scaler per symbol
+        """
+        from sklearn.preprocessing import MinMaxScaler
+
+        predictor = self.predictor
+        horizon = predictor.output_days()
+
+        scalers = {}
+        train_X, train_y, test_X, test_y = [], [], [], []
+        for symbol, symbol_prices in prices.items():
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            X, y = predictor.prepare_data(symbol_prices, predictor.sequence_length, scaler, horizon)
+            if len(X) < 2:
+                continue
+            scalers[symbol] = scaler
+
+            # Hold out the last 20% of every symbol so validation covers the whole universe
+            split = len(X) - int(np.ceil(len(X) * 0.2))
+            train_X.append(X[:split])
+            train_y.append(y[:split])
+            test_X.append(X[split:])
+            test_y.append(y[split:])
+
+        if not scalers:
+            return None, {}
+
+        model = predictor.fit_model(
+            np.concatenate(train_X), np.concatenate(train_y),
+            predictor.epochs, predictor.batch_size, progress,
+            validation=(np.concatenate(test_X), np.concatenate(test_y))
+        )
+        return model, scalers
+
+    def forecast_all(self, histories, days=7, symbols=None, universe=None, progress=None, samples=None):
+        """
+        Forecast every symbol with one batched inference call
+
+        Parameters:
+        - histories: Dictionary of symbol -> bar array
+        - days: Number of days to predict
+        - symbols: Symbols to forecast (default: every symbol in histories)
+        - universe: Symbols the model trains on (default: every symbol in histories);
+          other symbols are scaled on their own history at inference time
+        - progress: Optional callback progress(stage, **info)
+        - samples: Monte Carlo dropout samples per symbol for prediction
+          intervals (None uses the predictor's interval_samples, 0 disables)
+
+        Returns:
+        - Dictionary of symbol -> prediction dict (None when it can't be forecast)
+        """
+        predictor = self.predictor
+        symbols = list(histories) if symbols is None else symbols
+        training = {
+            symbol: history for symbol, history in histories.items()
+            if universe is None or symbol in universe
+        }
+        results = {symbol: None for symbol in symbols}
+        if not training:
+            log.warning("Universe training failed: no history")
+            return results
+
+        model_fp = self.model_fingerprint(training)
+        with stage('model_load'):
+            stored = self.registry.load(UNIVERSE_KEY, model_fp)
+
+        if stored:
+            log.debug("Using stored universe model", extra={'fingerprint': model_fp})
+            model, scalers, _ = stored
+        else:
+            log.info("Training universe model", extra={'symbols': len(training)})
+            model, scalers = self.train({
+                symbol: predictor.extract_prices(history)
+                for symbol, history in training.items()
+            }, progress)
+
+            if model is None:
+                log.warning("Universe training failed: not enough data")
+                return results
+
+            self.registry.save(UNIVERSE_KEY, model_fp, model, scalers, {
+                'lastBarDate': self.last_bar_date(training),
+                'hyperparams': self.hyperparams(training),
+            })
+            log.info("Universe model trained", extra={'fingerprint': model_fp})
+
+        if progress:
+            progress('inferring')
+
+        from sklearn.preprocessing import MinMaxScaler
+
+        prices = {}
+        for symbol in symbols:
+            history = histories.get(symbol)
+            if history is None or len(history) < predictor.sequence_length:
+                continue
+            prices[symbol] = predictor.extract_prices(history)
+            if symbol not in scalers:
+                # Don't mutate the stored dict; fit outsiders on their own range
+                scalers = dict(scalers)
+                scalers[symbol] = MinMaxScaler(feature_range=(0, 1)).fit(prices[symbol].reshape(-1, 1))
+
+        ready = list(prices)
+        if not ready:
+            return results
+
+        # One [symbols, time steps, 1] batch through the model
+        with stage('inference'):
+            windows = np.stack([
+                scalers[symbol].transform(
+                    prices[symbol][-predictor.sequence_length:].reshape(-1, 1)
+                ).astype(np.float32)
+                for symbol in ready
+            ])
+            predictions_scaled = predictor.predict_scaled_batch(model, windows, days)
+
+        # Monte Carlo samples for every symbol in the same single call
+        if samples is None:
+            samples = predictor.interval_samples
+        samples_scaled = [None] * len(ready)
+        if samples > 0:
+            with stage('intervals'):
+                samples_scaled = predictor.sample_scaled_batch(model, windows, days, samples)
+
+        for symbol, row, sampled in zip(ready, predictions_scaled, samples_scaled):
+            scaler = scalers[symbol]
+            predictions = [
+                float(p) for p in scaler.inverse_transform(row.reshape(-1, 1)).ravel()
+            ]
+            try:
+                intervals = None
+                if sampled is not None:
+                    intervals = predictor.prediction_intervals(
+                        scaler.inverse_transform(sampled.reshape(-1, 1)).reshape(sampled.shape)
+                    )
+                results[symbol] = predictor.build_result(
+                    symbol, float(prices[symbol][-1]), predictions, intervals=intervals
+                )
+            except Exception as e:
+                log.error("Error building prediction", extra={'symbol': symbol, 'error': str(e)})
+
+        return results
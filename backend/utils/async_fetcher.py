@@ -0,0 +1,336 @@
+"""
+Async Massive API Client
+Runs many symbol fetches concurrently on one event loop, under a
+concurrency cap and the shared API rate limit, with a sync facade for
+Flask routes and the prediction engine
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.bar_store import resample_bars
+from utils.history_format import bars_to_rows
+from utils.rate_limiter import current_priority, parse_retry_after, priority_scope
+from utils.structured_log import get_logger
+
+try:
+    import aiohttp
+except ImportError:  # Optional: without it requests run on a thread pool
+    aiohttp = None
+
+log = get_logger('async_fetcher')
+
+
+class AsyncMassiveFetcher:
+    """
+    Async counterpart of MassiveStockFetcher
+
+    Shares the sync fetcher's API key, bar store, rate limiter, retry policy
+    and response parsing. HTTP goes through aiohttp when it is installed,
+    otherwise through the sync fetcher's pooled session on a thread pool.
+    Coroutines run on a background event loop owned by this client; use
+    submit()/gather() from synchronous code.
+    """
+
+    def __init__(self, fetcher, concurrency=None):
+        self.fetcher = fetcher
+        # Max requests in flight at once (the rate limiter still applies)
+        self.concurrency = concurrency or int(os.getenv('MASSIVE_CONCURRENCY', 10))
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        # Created on the loop the first time they are needed
+        self._semaphore = None
+        self._session = None
+        self._executor = None
+        self._flights = {}
+
+    # EVENT LOOP
+
+    def _get_loop(self):
+        """Start the background event loop on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='massive-async', daemon=True).start()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    def close(self):
+        """Close the HTTP session and stop the background loop (restarted on next use)"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        atexit.unregister(self.close)
+        if self._session is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(5)
+            except Exception as e:
+                log.warning("Error closing async API session", extra={'error': str(e)})
+        loop.call_soon_threadsafe(loop.stop)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._session = self._semaphore = self._executor = None
+        self._flights = {}
+
+    def submit(self, method, *args):
+        """
+        Schedule one of the async fetch methods on the background loop
+
+        The caller's rate limit priority (see priority_scope) is carried over.
+
+        Parameters:
+        - method: Method name, e.g. 'get_historical_data'
+        - args: Method arguments
+
+        Returns:
+        - concurrent.futures.Future resolving to the method's result
+        """
+        coro = self._with_priority(current_priority(), getattr(self, method)(*args))
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def gather(self, method, symbols, *args, timeout=None):
+        """
+        Run an async fetch method for many symbols concurrently
+
+        Parameters:
+        - method: Method name taking the symbol as its first argument
+        - symbols: List of stock symbols
+        - timeout: Max seconds to wait for all of them
+
+        Returns:
+        - Dictionary of symbol -> result (None for symbols that failed or timed out)
+        """
+        futures = {symbol: self.submit(method, symbol, *args) for symbol in dict.fromkeys(symbols)}
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        results = {}
+        for symbol, future in futures.items():
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                results[symbol] = future.result(remaining)
+            except Exception as e:
+                log.warning("Async fetch failed", extra={
+                    'method': method,
+                    'symbol': symbol,
+                    'error': str(e) or type(e).__name__
+                })
+                future.cancel()
+                results[symbol] = None
+        return results
+
+    async def _with_priority(self, priority, coro):
+        with priority_scope(priority):
+            return await coro
+
+    async def _shared(self, key, fn, *args):
+        """Await fn(*args), joining an identical call that is already running"""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        # A cancelled caller must not cancel the call other callers share
+        return await asyncio.shield(task)
+
+    # HTTP
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _get_session(self):
+        if self._session is None:
+            connect_timeout, read_timeout = self.fetcher.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                headers={'Accept-Encoding': 'gzip, deflate'},
+            )
+        return self._session
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='massive-fetch')
+        return self._executor
+
+    async def _request(self, endpoint, params=None):
+        """Make request to Massive API (identical concurrent requests share one call)"""
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        return await self._shared(key, self._send, endpoint, params)
+
+    async def _send(self, endpoint, params):
+        async with self._get_semaphore():
+            if aiohttp is None:
+                loop = asyncio.get_running_loop()
+                # Through the fetcher's SingleFlight so threaded callers share the call too
+                return await loop.run_in_executor(
+                    self._get_executor(), self.fetcher._make_request, endpoint, dict(params or {}), current_priority()
+                )
+            return await self._aiohttp_request(endpoint, params)
+
+    async def _aiohttp_request(self, endpoint, params):
+        """
+        Make request to Massive API with rate limiting
+
+        Same policy as MassiveStockFetcher._request: wait for a rate limit
+        slot, retry connection errors and 5xx responses with jittered
+        exponential backoff, and block the limiter for Retry-After on a 429.
+        """
+        fetcher = self.fetcher
+        if not fetcher.api_key:
+            raise ValueError("MASSIVE_API_KEY not found. Please set it in .env file")
+
+        params = dict(params or {}, apiKey=fetcher.api_key)
+        url = f"{fetcher.base_url}{endpoint}"
+        priority = current_priority()
+        session = self._get_session()
+
+        try:
+            for attempt in range(fetcher.max_retries + 1):
+                last_attempt = attempt == fetcher.max_retries
+
+                waited = time.perf_counter()
+                acquired = await fetcher.rate_limiter.acquire_async(priority, timeout=fetcher.rate_limit_timeout)
+                fetcher._record_rate_wait(priority, time.perf_counter() - waited)
+                if not acquired:
+                    log.warning("Rate limit slot not available, giving up", extra={'endpoint': endpoint})
+                    return None
+
+                started = time.perf_counter()
+                try:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 429 and not last_attempt:
+                            retry_after = parse_retry_after(
+                                response.headers.get('Retry-After'),
+                                default=fetcher._backoff_delay(attempt)
+                            )
+                        elif response.status >= 500 and not last_attempt:
+                            retry_after = None
+                        else:
+                            response.raise_for_status()
+                            body = await response.read()
+                            fetcher._record_request(endpoint, response.status, time.perf_counter() - started)
+                            return fetcher._decode_json(endpoint, json.loads, body)
+                except aiohttp.ClientResponseError as e:
+                    fetcher._record_request(endpoint, e.status, time.perf_counter() - started)
+                    raise
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    fetcher._record_request(endpoint, 'error', time.perf_counter() - started)
+                    if last_attempt:
+                        raise
+                    delay = fetcher._backoff_delay(attempt)
+                    fetcher._record_retry(endpoint, 'network')
+                    log.warning("Network error, retrying", extra={
+                        'endpoint': endpoint,
+                        'error': str(e) or type(e).__name__,
+                        'delay': round(delay, 2)
+                    })
+                    await asyncio.sleep(delay)
+                    continue
+                fetcher._record_request(endpoint, response.status, time.perf_counter() - started)
+
+                # Handle rate limiting
+                if retry_after is not None:
+                    fetcher._record_retry(endpoint, 'rate_limited')
+                    log.warning("Rate limit hit, backing off", extra={'endpoint': endpoint, 'retry_after': round(retry_after, 1)})
+                    fetcher.rate_limiter.penalize(retry_after)
+                    continue
+
+                delay = fetcher._backoff_delay(attempt)
+                fetcher._record_retry(endpoint, 'server_error')
+                log.warning("Server error, retrying", extra={'endpoint': endpoint, 'status': response.status, 'delay': round(delay, 2)})
+                await asyncio.sleep(delay)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log.error("Error making request", extra={'endpoint': endpoint, 'error': str(e) or type(e).__name__})
+            return None
+
+    # FETCH METHODS (same surface as MassiveStockFetcher)
+
+    async def get_current_price(self, symbol):
+        """Get current price and details for a stock (previous close)"""
+        try:
+            data = await self._request(f"/v2/aggs/ticker/{symbol}/prev")
+            return self.fetcher._parse_quote(symbol, data)
+        except Exception as e:
+            log.error("Error fetching quote", extra={'symbol': symbol, 'error': str(e)})
+            return None
+
+    async def get_intraday_data(self, symbol):
+        """Get today's intraday data (previous close on the free tier)"""
+        try:
+            data = await self._request(f"/v2/aggs/ticker/{symbol}/prev")
+            return self.fetcher._parse_intraday(data)
+        except Exception as e:
+            log.error("Error fetching intraday data", extra={'symbol': symbol, 'error': str(e)})
+            return None
+
+    async def get_historical_data(self, symbol, period='1y', interval='1d'):
+        """Get historical stock data as per-bar dicts"""
+        bars = await self.get_historical_bars(symbol, period, interval)
+        if bars is None:
+            return None
+        return bars_to_rows(bars)
+
+    async def get_historical_bars(self, symbol, period='1y', interval='1d'):
+        """
+        Get historical bars, reading the local bar store first
+
+        Returns:
+        - Non-empty bar array, or None
+        """
+        key = ('history', symbol, period, interval)
+        return await self._shared(key, self._get_historical_bars, symbol, period, interval)
+
+    async def _get_historical_bars(self, symbol, period, interval):
+        fetcher = self.fetcher
+        try:
+            multiplier, timespan, from_date, to_date, resample = fetcher._history_range(period, interval)
+
+            # Bar store reads and writes hit the disk, so they run off the event loop
+            store_key = f"{multiplier}{timespan}"
+            gap = await self._in_thread(fetcher._store_gap, symbol, store_key, from_date)
+            if gap is not None:
+                endpoint, params = fetcher._aggregates_request(symbol, multiplier, timespan, gap[0], to_date)
+                data = await self._request(endpoint, params)
+                if not await self._in_thread(self._save_aggregates, symbol, store_key, gap, data):
+                    log.info("No results", extra={'symbol': symbol})
+                    return None
+
+            bars = await self._in_thread(self._load_stored, symbol, store_key, from_date, to_date, resample)
+
+            if len(bars) == 0:
+                log.info("No results", extra={'symbol': symbol})
+                return None
+            return bars
+        except Exception as e:
+            log.exception("Error fetching historical data", extra={'symbol': symbol, 'error': str(e)})
+            return None
+
+    async def _in_thread(self, fn, *args):
+        """Run blocking fn(*args) on the default executor, keeping the caller's context"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, fn, *args))
+
+    def _save_aggregates(self, symbol, store_key, gap, data):
+        """Parse an aggregates response and merge it into the bar store (worker thread)"""
+        fetched = self.fetcher._parse_aggregates(symbol, data)
+        return self.fetcher._save_bars(symbol, store_key, gap, fetched)
+
+    def _load_stored(self, symbol, store_key, from_date, to_date, resample):
+        """Requested range from the bar store, resampled if needed (worker thread)"""
+        bars = self.fetcher._slice_stored(symbol, store_key, from_date, to_date)
+        if resample:
+            bars = resample_bars(bars, resample, from_date)
+        return bars
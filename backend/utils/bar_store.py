@@ -0,0 +1,271 @@
+"""
+Local OHLCV Bar Store for Massive API aggregates
+Keeps one memory-mappable NumPy file per symbol/timespan so repeat
+history requests are served from disk instead of the API
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from operator import itemgetter
+
+import numpy as np
+
+from utils.structured_log import get_logger
+
+log = get_logger('bar_store')
+
+# Columnar layout of a single aggregates bar (same keys as the API response)
+BAR_DTYPE = np.dtype([
+    ('t', '<i8'),   # Bar start, epoch milliseconds
+    ('o', '<f8'),
+    ('h', '<f8'),
+    ('l', '<f8'),
+    ('c', '<f8'),
+    ('v', '<i8'),
+])
+
+DEFAULT_STORE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bars'
+)
+
+
+def empty_bars():
+    """Return an empty bar array"""
+    return np.empty(0, dtype=BAR_DTYPE)
+
+
+# Reads a result dict's fields in BAR_DTYPE order
+_bar_fields = itemgetter(*BAR_DTYPE.names)
+
+
+def bars_from_results(results):
+    """
+    Convert a list of aggregates result dicts into a bar array
+
+    All values are read in one C-level pass into a float64 matrix (exact for
+    epoch milliseconds and volumes) and cast into the typed columns, so no
+    per-bar tuples or NumPy scalars are created. Bars without a timestamp
+    are dropped.
+    """
+    if not results:
+        return empty_bars()
+
+    try:
+        values = np.array(list(map(_bar_fields, results)), dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        # Some bars lack a field (or hold null): read them one by one
+        values = np.array(
+            [[item.get(name) or 0 for name in BAR_DTYPE.names] for item in results],
+            dtype=np.float64
+        )
+
+    bars = np.empty(len(values), dtype=BAR_DTYPE)
+    for i, name in enumerate(BAR_DTYPE.names):
+        bars[name] = values[:, i]
+    return bars[bars['t'] != 0]
+
+
+# Coarser timespans derived from stored daily bars instead of the API
+RESAMPLED_TIMESPANS = ('week', 'month')
+
+MS_PER_DAY = 86400000
+
+
+def _period_keys(days, timespan):
+    """Week (Monday start) or month number of each epoch day"""
+    if timespan == 'week':
+        # 1970-01-01 was a Thursday; shift so weeks roll over on Mondays
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def _period_start_day(key, timespan):
+    """Epoch day on which a week/month period begins"""
+    if timespan == 'week':
+        return key * 7 - 3
+    return int(np.datetime64(int(key), 'M').astype('datetime64[D]').astype(np.int64))
+
+
+def period_start_date(date, timespan):
+    """
+    First calendar day of the week (Monday) or month containing a date
+
+    Parameters:
+    - date: YYYY-MM-DD
+    - timespan: 'week' or 'month'
+
+    Returns:
+    - YYYY-MM-DD
+    """
+    day = np.datetime64(date, 'D').astype(np.int64)
+    key = _period_keys(np.array([day]), timespan)[0]
+    return str(np.datetime64(int(_period_start_day(key, timespan)), 'D'))
+
+
+def resample_bars(bars, timespan, start_date=None):
+    """
+    Aggregate daily bars into weekly or monthly bars
+
+    Each output bar takes the first open, highest high, lowest low, last
+    close and summed volume of the trading days in its period; its
+    timestamp is the period's first trading day.
+
+    Parameters:
+    - bars: Daily bar array, oldest first
+    - timespan: 'week' or 'month'
+    - start_date: Requested range start (YYYY-MM-DD); a first period that
+      began before it is dropped because its opening days are missing,
+      unless it is the only one (see period_start_date to avoid partials)
+
+    Returns:
+    - Bar array
+    """
+    if len(bars) == 0:
+        return empty_bars()
+
+    # Daily bars are stamped at midnight exchange time, which is the same
+    # calendar day in UTC
+    days = bars['t'] // MS_PER_DAY
+    keys = _period_keys(days, timespan)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    resampled = np.empty(len(starts), dtype=BAR_DTYPE)
+    resampled['t'] = bars['t'][starts]
+    resampled['o'] = bars['o'][starts]
+    resampled['h'] = np.maximum.reduceat(bars['h'], starts)
+    resampled['l'] = np.minimum.reduceat(bars['l'], starts)
+    resampled['c'] = bars['c'][ends]
+    resampled['v'] = np.add.reduceat(bars['v'], starts)
+
+    if start_date is not None:
+        first_day = np.datetime64(start_date, 'D').astype(np.int64)
+        if _period_start_day(keys[0], timespan) < first_day and len(resampled) > 1:
+            resampled = resampled[1:]
+
+    return resampled
+
+
+def _merge_bars(existing, bars):
+    """Merge two bar arrays, keeping the newer copy of shared timestamps"""
+    merged = np.concatenate([existing, bars.astype(BAR_DTYPE)])
+    _, idx = np.unique(merged['t'][::-1], return_index=True)
+    return merged[::-1][idx]
+
+
+def _earliest(a, b):
+    """Earlier of two YYYY-MM-DD dates, ignoring None"""
+    dates = [d for d in (a, b) if d is not None]
+    return min(dates) if dates else None
+
+
+class BarStore:
+    """On-disk columnar store of OHLCV bars"""
+
+    def __init__(self, root=None, max_age=None):
+        self.root = root or os.getenv('BAR_STORE_DIR', DEFAULT_STORE_DIR)
+        # Seconds a store file is considered current after its last top-up
+        self.max_age = max_age if max_age is not None else int(os.getenv('BAR_STORE_MAX_AGE', 3600))
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, timespan, ext):
+        return os.path.join(self.root, timespan, f"{symbol}.{ext}")
+
+    def load(self, symbol, timespan):
+        """Load stored bars as a read-only memory map (empty if missing)"""
+        path = self._path(symbol, timespan, 'npy')
+        if not os.path.exists(path):
+            return empty_bars()
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            log.warning("Corrupt bar store file", extra={'path': path, 'error': str(e)})
+            return empty_bars()
+
+    def meta(self, symbol, timespan):
+        """
+        Get store metadata
+
+        Returns:
+        - Dictionary with 'start' (earliest requested date) and 'checked' (last top-up epoch)
+        """
+        path = self._path(symbol, timespan, 'json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_current(self, symbol, timespan):
+        """Whether the store was topped up recently enough to skip the API"""
+        checked = self.meta(symbol, timespan).get('checked', 0)
+        return time.time() - checked < self.max_age
+
+    def write(self, symbol, timespan, bars, start=None):
+        """
+        Replace stored bars for a symbol/timespan
+
+        If the store already reaches back further than start (another writer
+        fetched a longer range meanwhile), the older bars are kept so the
+        stored 'start' still holds.
+        """
+        with self._lock:
+            stored_start = self.meta(symbol, timespan).get('start')
+            if stored_start is not None and start is not None and stored_start < start:
+                bars = _merge_bars(np.array(self.load(symbol, timespan)), bars)
+            self._write(symbol, timespan, bars, start)
+
+    def append(self, symbol, timespan, bars):
+        """
+        Merge new bars into the store
+
+        Bars sharing a timestamp with stored ones replace them, so a partial
+        last bar gets refreshed on the next top-up.
+        """
+        with self._lock:
+            start = self.meta(symbol, timespan).get('start')
+            if len(bars) == 0:
+                self._write_meta(symbol, timespan, start)
+                return
+
+            existing = np.array(self.load(symbol, timespan))
+            self._write(symbol, timespan, _merge_bars(existing, bars), start)
+
+    def slice(self, symbol, timespan, start_ms, end_ms):
+        """Return stored bars with start_ms <= t <= end_ms"""
+        bars = self.load(symbol, timespan)
+        lo = np.searchsorted(bars['t'], start_ms, side='left')
+        hi = np.searchsorted(bars['t'], end_ms, side='right')
+        return bars[lo:hi]
+
+    def last_date(self, symbol, timespan):
+        """Date (YYYY-MM-DD) of the newest stored bar, or None"""
+        bars = self.load(symbol, timespan)
+        if len(bars) == 0:
+            return None
+        return datetime.fromtimestamp(int(bars['t'][-1]) / 1000, timezone.utc).strftime('%Y-%m-%d')
+
+    def _write(self, symbol, timespan, bars, start):
+        path = self._path(symbol, timespan, 'npy')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to temp files then rename so readers never see partial data
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        os.replace(tmp_path, path)
+
+        self._write_meta(symbol, timespan, start)
+
+    def _write_meta(self, symbol, timespan, start):
+        # Never narrow 'start': a concurrent full write may have stored an
+        # earlier one since the caller read the metadata
+        start = _earliest(self.meta(symbol, timespan).get('start'), start)
+        meta_path = self._path(symbol, timespan, 'json')
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, 'w') as f:
+            json.dump({'start': start, 'checked': time.time()}, f)
+        os.replace(tmp_meta, meta_path)
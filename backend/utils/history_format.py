@@ -0,0 +1,143 @@
+"""
+History Payload Formatting
+Serializes bar arrays as row JSON, columnar JSON or MessagePack, and
+downsamples long ranges with Largest-Triangle-Three-Buckets (LTTB)
+"""
+
+import time
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for format=msgpack
+    msgpack = None
+
+HISTORY_FORMATS = ('json', 'columnar', 'msgpack')
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Pick the points that best preserve a line's shape (LTTB)
+
+    The first and last points are always kept. Every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+
+    Parameters:
+    - x, y: float arrays of equal length, x ascending
+    - max_points: Number of points to keep (at least 3)
+
+    Returns:
+    - Sorted int array of indices into x/y
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = (np.arange(max_points - 1) * ((n - 2) / (max_points - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Average point of each bucket (the last "next bucket" is the final point)
+    sizes = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area (a, candidate, next bucket average)
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_bars(bars, max_points):
+    """
+    Reduce a bar array to at most max_points bars, shaped on the close
+
+    Returns:
+    - The original array when it is already short enough
+    """
+    if not max_points or len(bars) <= max_points:
+        return bars
+    return bars[lttb_indices(bars['t'], bars['c'], max_points)]
+
+
+def bar_dates(t):
+    """
+    Format bar timestamps as local 'YYYY-MM-DD HH:MM:SS' strings
+
+    Parameters:
+    - t: int array of epoch milliseconds
+
+    Returns:
+    - List of date strings
+    """
+    seconds = np.asarray(t, dtype=np.int64) // 1000
+    # Local UTC offset of each bar (changes across daylight saving time)
+    offsets = np.fromiter(
+        (time.localtime(s).tm_gmtoff for s in seconds.tolist()), dtype=np.int64, count=len(seconds)
+    )
+    dates = np.datetime_as_string((seconds + offsets).astype('datetime64[s]')).tolist()
+    return [date.replace('T', ' ') for date in dates]
+
+
+def bars_to_rows(bars):
+    """Per-bar dicts in the /history JSON layout"""
+    columns = zip(
+        bar_dates(bars['t']),
+        np.round(bars['o'], 2).tolist(),
+        np.round(bars['h'], 2).tolist(),
+        np.round(bars['l'], 2).tolist(),
+        np.round(bars['c'], 2).tolist(),
+        bars['v'].tolist(),
+    )
+    return [
+        {'date': date, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for date, o, h, l, c, v in columns
+    ]
+
+
+def bars_to_columns(bars):
+    """
+    Parallel arrays keyed by field
+
+    Returns:
+    - Dictionary with 't' (bar start, epoch milliseconds), 'open', 'high',
+      'low', 'close' and 'volume' lists
+    """
+    return {
+        't': bars['t'].tolist(),
+        'open': np.round(bars['o'], 2).tolist(),
+        'high': np.round(bars['h'], 2).tolist(),
+        'low': np.round(bars['l'], 2).tolist(),
+        'close': np.round(bars['c'], 2).tolist(),
+        'volume': bars['v'].tolist(),
+    }
+
+
+def pack(payload):
+    """
+    Serialize a payload as MessagePack
+
+    Returns:
+    - bytes, or None if msgpack is not installed
+    """
+    if msgpack is None:
+        return None
+    return msgpack.packb(payload, use_bin_type=True)
@@ -4,19 +4,101 @@ Optimized for FREE TIER - 5 API calls/minute
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
+import random
+import threading
 import time
+from dotenv import load_dotenv
+
+from utils.async_fetcher import AsyncMassiveFetcher
+from utils.bar_store import (
+    RESAMPLED_TIMESPANS,
+    BarStore,
+    bars_from_results,
+    period_start_date,
+    resample_bars,
+)
+from utils.history_format import bars_to_rows
+from utils.metrics import metrics, record_timing, stage
+from utils.rate_limiter import api_rate_limiter, current_priority, parse_retry_after
+from utils.single_flight import SingleFlight
+from utils.structured_log import get_logger
 
 load_dotenv()
 
+log = get_logger('massive_api')
+
+UPSTREAM_SECONDS = metrics.histogram(
+    'massive_upstream_request_seconds',
+    'Massive API request latency by endpoint and HTTP status',
+    ('endpoint', 'status'),
+)
+UPSTREAM_RETRIES = metrics.counter(
+    'massive_upstream_retries',
+    'Massive API retries by endpoint and reason',
+    ('endpoint', 'reason'),
+)
+RATE_LIMIT_WAIT = metrics.histogram(
+    'massive_rate_limit_wait_seconds',
+    'Time spent waiting for a rate limit slot',
+    ('priority',),
+)
+JSON_PARSE_SECONDS = metrics.histogram(
+    'massive_json_parse_seconds',
+    'Time spent decoding Massive API responses',
+    ('endpoint',),
+)
+BAR_STORE_LOOKUPS = metrics.counter(
+    'bar_store_lookups',
+    'History lookups answered by the bar store (hit), a top-up or a full fetch (miss)',
+    ('result',),
+)
+
+
+def endpoint_label(endpoint):
+    """Low-cardinality metric label for an API path (no symbols or dates)"""
+    if endpoint.startswith('/v2/aggs/grouped/'):
+        return 'aggs_grouped'
+    if endpoint.startswith('/v2/aggs/ticker/'):
+        return 'aggs_prev' if endpoint.endswith('/prev') else 'aggs_range'
+    return 'other'
+
+
 class MassiveStockFetcher:
     """Fetch stock data from Massive API """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, bar_store=None, rate_limiter=None):
         self.api_key = api_key or os.getenv('MASSIVE_API_KEY')
-        self.base_url = 'https://api.polygon.io'
+        self.base_url = os.getenv('MASSIVE_BASE_URL', 'https://api.polygon.io')
+        self.bar_store = bar_store or BarStore()
+        self.rate_limiter = rate_limiter or api_rate_limiter
+        # Max seconds a caller waits for a rate limit slot
+        self.rate_limit_timeout = float(os.getenv('MASSIVE_RATE_TIMEOUT', 60))
+        
+        # HTTP settings: (connect, read) timeouts and retry/backoff policy
+        self.timeout = (
+            float(os.getenv('MASSIVE_CONNECT_TIMEOUT', 3.05)),
+            float(os.getenv('MASSIVE_READ_TIMEOUT', 15)),
+        )
+        self.max_retries = int(os.getenv('MASSIVE_MAX_RETRIES', 3))
+        self.backoff_base = float(os.getenv('MASSIVE_BACKOFF_BASE', 0.5))
+        self.backoff_max = float(os.getenv('MASSIVE_BACKOFF_MAX', 8))
+        self.session = self._create_session(int(os.getenv('MASSIVE_POOL_SIZE', 10)))
+        
+        # Grouped-daily market snapshot: previous-day bars for every ticker
+        self.snapshot_ttl = int(os.getenv('GROUPED_SNAPSHOT_TTL', 900))
+        self._snapshot = None
+        # Guards reads and writes of the cached snapshot only; refreshes are
+        # coalesced through _flights so the lock is never held across requests
+        self._snapshot_lock = threading.Lock()
+        
+        # Coalesces identical concurrent API requests and history lookups
+        self._flights = SingleFlight()
+        
+        # Async client for fetching many symbols concurrently (MASSIVE_CONCURRENCY)
+        self.async_client = AsyncMassiveFetcher(self)
         
         # Top 50 Global Stocks
         self.POPULAR_STOCKS = {
@@ -83,8 +165,40 @@ class MassiveStockFetcher:
             'CMCSA': 'Comcast Corp'
         }
     
-    def _make_request(self, endpoint, params=None):
-        """Make request to Massive API with rate limiting"""
+    def _create_session(self, pool_size):
+        """Create a pooled keep-alive session for the API host"""
+        session = requests.Session()
+        
+        # Retries are handled in _make_request so they go through the rate limiter
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        return session
+    
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _make_request(self, endpoint, params=None, priority=None):
+        """
+        Make request to Massive API, sharing the response with identical
+        requests already in flight (one upstream call for a thundering herd)
+        """
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        return self._flights.do(key, self._request, endpoint, params, priority)
+    
+    def _request(self, endpoint, params=None, priority=None):
+        """
+        Make request to Massive API with rate limiting
+        
+        Waits for a slot from the shared rate limiter (interactive callers are
+        served first). Connection errors and 5xx responses are retried with
+        jittered exponential backoff; a 429 blocks the limiter for Retry-After.
+        """
         if not self.api_key:
             raise ValueError("MASSIVE_API_KEY not found. Please set it in .env file")
         
@@ -92,33 +206,133 @@ class MassiveStockFetcher:
             params = {}
         
         params['apiKey'] = self.api_key
+        url = f"{self.base_url}{endpoint}"
+        
+        if priority is None:
+            priority = current_priority()
         
+        response = None
         try:
-            response = requests.get(f"{self.base_url}{endpoint}", params=params, timeout=15)
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                print("Rate limit hit. Waiting 15 seconds...")
-                time.sleep(15)
-                response = requests.get(f"{self.base_url}{endpoint}", params=params, timeout=15)
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                
+                waited = time.perf_counter()
+                acquired = self.rate_limiter.acquire(priority, timeout=self.rate_limit_timeout)
+                self._record_rate_wait(priority, time.perf_counter() - waited)
+                if not acquired:
+                    log.warning("Rate limit slot not available, giving up", extra={'endpoint': endpoint})
+                    return None
+                
+                started = time.perf_counter()
+                try:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    self._record_request(endpoint, 'error', time.perf_counter() - started)
+                    if last_attempt:
+                        raise
+                    delay = self._backoff_delay(attempt)
+                    self._record_retry(endpoint, 'network')
+                    log.warning("Network error, retrying", extra={'endpoint': endpoint, 'error': str(e), 'delay': round(delay, 2)})
+                    time.sleep(delay)
+                    continue
+                self._record_request(endpoint, response.status_code, time.perf_counter() - started)
+                
+                # Handle rate limiting
+                if response.status_code == 429 and not last_attempt:
+                    retry_after = parse_retry_after(
+                        response.headers.get('Retry-After'),
+                        default=self._backoff_delay(attempt)
+                    )
+                    self._record_retry(endpoint, 'rate_limited')
+                    log.warning("Rate limit hit, backing off", extra={'endpoint': endpoint, 'retry_after': round(retry_after, 1)})
+                    self.rate_limiter.penalize(retry_after)
+                    continue
+                
+                if response.status_code >= 500 and not last_attempt:
+                    delay = self._backoff_delay(attempt)
+                    self._record_retry(endpoint, 'server_error')
+                    log.warning("Server error, retrying", extra={'endpoint': endpoint, 'status': response.status_code, 'delay': round(delay, 2)})
+                    time.sleep(delay)
+                    continue
+                
+                break
             
             response.raise_for_status()
-            return response.json()
+            return self._decode_json(endpoint, response.json)
         except requests.exceptions.RequestException as e:
-            print(f"Error making request to {endpoint}: {str(e)}")
-            if hasattr(response, 'text'):
-                print(f"Response: {response.text}")
+            log.error("Error making request", extra={
+                'endpoint': endpoint,
+                'error': str(e),
+                'response': response.text[:500] if response is not None else None
+            })
             return None
     
-    def get_all_stocks(self):
-        """Get list of all available stocks"""
-        return [
+    def _record_request(self, endpoint, status, seconds):
+        """Record an upstream request's latency by endpoint and status"""
+        UPSTREAM_SECONDS.observe(seconds, endpoint=endpoint_label(endpoint), status=status)
+        record_timing('upstream', seconds)
+    
+    def _record_retry(self, endpoint, reason):
+        UPSTREAM_RETRIES.inc(endpoint=endpoint_label(endpoint), reason=reason)
+    
+    def _record_rate_wait(self, priority, seconds):
+        RATE_LIMIT_WAIT.observe(seconds, priority=priority)
+        if seconds >= 0.001:
+            record_timing('rate_limit_wait', seconds)
+    
+    def _decode_json(self, endpoint, decode, *args):
+        """Run a response decoder, timed as the json_parse stage"""
+        with stage('json_parse', JSON_PARSE_SECONDS, endpoint=endpoint_label(endpoint)):
+            return decode(*args)
+    
+    def get_all_stocks(self, with_prices=False):
+        """
+        Get list of all available stocks
+        
+        Parameters:
+        - with_prices: Include previous-day quote fields from the market snapshot
+        """
+        stocks = [
             {
                 'symbol': symbol,
                 'name': name
             }
             for symbol, name in self.POPULAR_STOCKS.items()
         ]
+        
+        if with_prices:
+            snapshot = self.get_market_snapshot()
+            if snapshot:
+                for stock in stocks:
+                    result = snapshot['bars'].get(stock['symbol'])
+                    if result:
+                        stock.update(self._format_quote(stock['symbol'], result))
+        
+        return stocks
+    
+    def _format_quote(self, symbol, result):
+        """Convert a daily aggregates bar into the current price response format"""
+        current_price = result.get('c', 0)  # Close price
+        open_price = result.get('o', 0)
+        
+        # Calculate change from open to close
+        change = current_price - open_price if current_price and open_price else 0
+        change_percent = (change / open_price * 100) if open_price != 0 else 0
+        
+        return {
+            'symbol': symbol,
+            'name': self.POPULAR_STOCKS.get(symbol, 'Unknown'),
+            'currentPrice': round(current_price, 2) if current_price else 0,
+            'previousClose': round(open_price, 2),
+            'change': round(change, 2),
+            'changePercent': round(change_percent, 2),
+            'volume': result.get('v', 0),
+            'marketCap': 0,
+            'dayHigh': round(result.get('h', 0), 2),
+            'dayLow': round(result.get('l', 0), 2),
+            'fiftyTwoWeekHigh': 0,
+            'fiftyTwoWeekLow': 0,
+        }
     
     def get_current_price(self, symbol):
         """
@@ -128,143 +342,300 @@ class MassiveStockFetcher:
         try:
             # Use previous close endpoint (more reliable on free tier)
             endpoint = f"/v2/aggs/ticker/{symbol}/prev"
-            data = self._make_request(endpoint)
-            
-            # Free tier returns "DELAYED" status which is OK for our use case
-            if not data or data.get('status') not in ['OK', 'DELAYED']:
-                print(f"API Error for {symbol}: {data}")
-                return None
-            
-            results = data.get('results', [])
-            if not results or len(results) == 0:
-                print(f"No results for {symbol}")
-                return None
-            
-            result = results[0]
-            
-            current_price = result.get('c', 0)  # Close price
-            open_price = result.get('o', 0)
-            
-            # Calculate change from open to close
-            change = current_price - open_price if current_price and open_price else 0
-            change_percent = (change / open_price * 100) if open_price != 0 else 0
-            
-            return {
-                'symbol': symbol,
-                'name': self.POPULAR_STOCKS.get(symbol, 'Unknown'),
-                'currentPrice': round(current_price, 2) if current_price else 0,
-                'previousClose': round(open_price, 2),
-                'change': round(change, 2),
-                'changePercent': round(change_percent, 2),
-                'volume': result.get('v', 0),
-                'marketCap': 0,
-                'dayHigh': round(result.get('h', 0), 2),
-                'dayLow': round(result.get('l', 0), 2),
-                'fiftyTwoWeekHigh': 0,
-                'fiftyTwoWeekLow': 0,
-            }
+            return self._parse_quote(symbol, self._make_request(endpoint))
         except Exception as e:
-            print(f"Error fetching data for {symbol}: {str(e)}")
+            log.error("Error fetching quote", extra={'symbol': symbol, 'error': str(e)})
+            return None
+    
+    def _parse_quote(self, symbol, data):
+        """Quote from a previous-close response, or None"""
+        # Free tier returns "DELAYED" status which is OK for our use case
+        if not data or data.get('status') not in ['OK', 'DELAYED']:
+            log.warning("API error", extra={'symbol': symbol, 'response': data})
+            return None
+        
+        results = data.get('results', [])
+        if not results or len(results) == 0:
+            log.info("No results", extra={'symbol': symbol})
             return None
+        
+        return self._format_quote(symbol, results[0])
+    
+    def get_grouped_daily(self, date):
+        """
+        Get daily bars for the whole US stock market in one call
+        
+        Parameters:
+        - date: Trading date (YYYY-MM-DD)
+        
+        Returns:
+        - Dictionary of ticker -> aggregates bar (empty on non-trading days), or None on API error
+        """
+        endpoint = f"/v2/aggs/grouped/locale/us/market/stocks/{date}"
+        data = self._make_request(endpoint, {'adjusted': 'true'})
+        
+        if not data or data.get('status') not in ['OK', 'DELAYED']:
+            log.warning("Grouped daily error", extra={'date': date, 'response': data})
+            return None
+        
+        return {
+            item['T']: item
+            for item in data.get('results', []) or []
+            if item.get('T')
+        }
+    
+    def get_market_snapshot(self):
+        """
+        Get the most recent grouped-daily snapshot, refreshed every snapshot_ttl seconds
+        
+        Returns:
+        - Dictionary with 'date', 'fetchedAt' and 'bars' (ticker -> bar), or None
+        """
+        snapshot = self._fresh_snapshot()
+        if snapshot:
+            return snapshot
+        # Concurrent callers share one walk over the grouped-daily endpoint
+        return self._flights.do(('snapshot',), self._refresh_snapshot)
+    
+    def _fresh_snapshot(self):
+        """Cached snapshot if younger than snapshot_ttl, else None"""
+        with self._snapshot_lock:
+            if self._snapshot and time.time() - self._snapshot['fetchedAt'] < self.snapshot_ttl:
+                return self._snapshot
+        return None
+    
+    def _refresh_snapshot(self):
+        """Fetch the latest grouped-daily snapshot and cache it (stale cache on failure)"""
+        # A refresh that finished just before this call started already did the work
+        snapshot = self._fresh_snapshot()
+        if snapshot:
+            return snapshot
+        
+        # Walk back from yesterday to the latest trading day with data
+        day = datetime.now()
+        for _ in range(7):
+            day -= timedelta(days=1)
+            if day.weekday() >= 5:
+                continue
+            
+            date = day.strftime('%Y-%m-%d')
+            bars = self.get_grouped_daily(date)
+            if bars is None:
+                break
+            if bars:
+                log.info("Loaded grouped daily snapshot", extra={'date': date, 'tickers': len(bars)})
+                with self._snapshot_lock:
+                    self._snapshot = {
+                        'date': date,
+                        'fetchedAt': time.time(),
+                        'bars': bars
+                    }
+                break
+        
+        with self._snapshot_lock:
+            return self._snapshot
     
     def get_historical_data(self, symbol, period='1y', interval='1d'):
         """
         Get historical stock data - FREE TIER COMPATIBLE
         Uses Aggregates API with adjusted parameters for free tier
         """
+        bars = self.get_historical_bars(symbol, period, interval)
+        if bars is None:
+            return None
+        
+        # Convert to standardized format
+        historical_data = bars_to_rows(bars)
+        
+        log.debug("Processed data points", extra={'symbol': symbol, 'points': len(historical_data)})
+        return historical_data
+    
+    def get_historical_bars(self, symbol, period='1y', interval='1d'):
+        """
+        Get historical bars as a columnar array (see utils.bar_store.BAR_DTYPE)
+        
+        Concurrent calls with the same arguments share one array;
+        callers must not modify it.
+        
+        Returns:
+        - Non-empty bar array, or None
+        """
+        key = ('history', symbol, period, interval)
+        return self._flights.do(key, self._get_historical_bars, symbol, period, interval)
+    
+    def _get_historical_bars(self, symbol, period, interval):
         try:
-            # Convert period to date range
-            end_date = datetime.now()
+            multiplier, timespan, from_date, to_date, resample = self._history_range(period, interval)
             
-            # FREE TIER: Limit to 2 years max for better performance
-            period_map = {
-                '1d': 1,
-                '5d': 5,
-                '1mo': 30,
-                '3mo': 90,
-                '6mo': 180,
-                '1y': 365,
-                '2y': 730,
-                'ALL': 730,  # Max 2 years on free tier
-            }
+            bars = self._get_stored_bars(symbol, multiplier, timespan, from_date, to_date)
+            if bars is not None and resample:
+                bars = resample_bars(bars, resample, from_date)
             
-            days = period_map.get(period, 365)
-            start_date = end_date - timedelta(days=days)
-            
-            # For free tier, use daily data only (more reliable)
-            if interval not in ['1d', '1wk', '1mo']:
-                interval = '1d'
-            
-            # Convert interval to Massive format
-            interval_map = {
-                '1d': ('1', 'day'),
-                '1wk': ('1', 'week'),
-                '1mo': ('1', 'month'),
-            }
-            
-            multiplier, timespan = interval_map.get(interval, ('1', 'day'))
-            
-            # Format dates for API
-            from_date = start_date.strftime('%Y-%m-%d')
-            to_date = end_date.strftime('%Y-%m-%d')
-            
-            # Make API request
-            endpoint = f"/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{from_date}/{to_date}"
-            params = {
-                'adjusted': 'true',
-                'sort': 'asc',
-                'limit': 5000  
-            }
-            
-            print(f"Requesting: {endpoint}")
-            print(f"Params: {params}")
-            
-            data = self._make_request(endpoint, params)
-            
-            if not data:
-                print(f"No data returned from API for {symbol}")
+            if bars is None or len(bars) == 0:
+                log.info("No results", extra={'symbol': symbol})
                 return None
             
-            print(f"API Response status: {data.get('status')}")
-            print(f"Results count: {data.get('resultsCount', 0)}")
-            
-            # returns "DELAYED" status but data is still valid
-            status = data.get('status')
-            if status not in ['OK', 'DELAYED']:
-                print(f"API returned error status: {data}")
-                return None
-            
-            results = data.get('results', [])
-            
-            if not results or len(results) == 0:
-                print(f"No results in response for {symbol}")
-                return None
-            
-            # Convert to standardized format
-            historical_data = []
-            for item in results:
-                timestamp = item.get('t', 0)
-                if timestamp:
-                    date = datetime.fromtimestamp(timestamp / 1000)
-                    
-                    historical_data.append({
-                        'date': date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'open': round(item.get('o', 0), 2),
-                        'high': round(item.get('h', 0), 2),
-                        'low': round(item.get('l', 0), 2),
-                        'close': round(item.get('c', 0), 2),
-                        'volume': int(item.get('v', 0))
-                    })
-            
-            print(f"Processed {len(historical_data)} data points")
-            return historical_data
+            return bars
             
         except Exception as e:
-            print(f"Error fetching historical data for {symbol}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error fetching historical data", extra={'symbol': symbol, 'error': str(e)})
             return None
     
+    def _history_range(self, period, interval):
+        """
+        Resolve a history request to stored bars
+        
+        Returns:
+        - (multiplier, timespan, from_date, to_date, resample): the stored
+          bars to read and the timespan to resample them to (or None)
+        """
+        # Convert period to date range
+        end_date = datetime.now()
+        
+        # FREE TIER: Limit to 2 years max for better performance
+        period_map = {
+            '1d': 1,
+            '5d': 5,
+            '1mo': 30,
+            '3mo': 90,
+            '6mo': 180,
+            '1y': 365,
+            '2y': 730,
+            'ALL': 730,  # Max 2 years on free tier
+        }
+        
+        days = period_map.get(period, 365)
+        start_date = end_date - timedelta(days=days)
+        
+        # For free tier, use daily data only (more reliable)
+        if interval not in ['1d', '1wk', '1mo']:
+            interval = '1d'
+        
+        # Convert interval to Massive format
+        interval_map = {
+            '1d': ('1', 'day'),
+            '1wk': ('1', 'week'),
+            '1mo': ('1', 'month'),
+        }
+        
+        multiplier, timespan = interval_map.get(interval, ('1', 'day'))
+        
+        # Format dates for API
+        from_date = start_date.strftime('%Y-%m-%d')
+        to_date = end_date.strftime('%Y-%m-%d')
+        
+        if timespan in RESAMPLED_TIMESPANS:
+            # Weekly/monthly bars are built from the daily store, so
+            # switching chart timeframes needs no extra API calls. Daily
+            # bars start with the first period so it is complete, like the
+            # API's own weekly/monthly aggregates
+            return '1', 'day', period_start_date(from_date, timespan), to_date, timespan
+        return multiplier, timespan, from_date, to_date, None
+    
+    def _fetch_aggregates(self, symbol, multiplier, timespan, from_date, to_date):
+        """
+        Fetch aggregates bars from the API
+        
+        Returns:
+        - Bar array (possibly empty), or None on API error
+        """
+        endpoint, params = self._aggregates_request(symbol, multiplier, timespan, from_date, to_date)
+        return self._parse_aggregates(symbol, self._make_request(endpoint, params))
+    
+    def _aggregates_request(self, symbol, multiplier, timespan, from_date, to_date):
+        """Endpoint and query parameters of an aggregates request"""
+        endpoint = f"/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{from_date}/{to_date}"
+        params = {
+            'adjusted': 'true',
+            'sort': 'asc',
+            'limit': 5000  
+        }
+        
+        log.debug("Requesting aggregates", extra={'endpoint': endpoint, 'params': params})
+        return endpoint, params
+    
+    def _parse_aggregates(self, symbol, data):
+        """Bar array from an aggregates response, or None on API error"""
+        if not data:
+            log.warning("No data returned from API", extra={'symbol': symbol})
+            return None
+        
+        log.debug("Aggregates response", extra={
+            'symbol': symbol,
+            'status': data.get('status'),
+            'results': data.get('resultsCount', 0)
+        })
+        
+        # returns "DELAYED" status but data is still valid
+        status = data.get('status')
+        if status not in ['OK', 'DELAYED']:
+            log.warning("API returned error status", extra={'symbol': symbol, 'response': data})
+            return None
+        
+        return bars_from_results(data.get('results', []))
+    
+    def _get_stored_bars(self, symbol, multiplier, timespan, from_date, to_date):
+        """
+        Get bars for a date range, reading the local bar store first
+        
+        Only the missing tail of dates is requested from the API and appended
+        to the store. A current store answers without any network call.
+        """
+        store_key = f"{multiplier}{timespan}"
+        gap = self._store_gap(symbol, store_key, from_date)
+        if gap is not None:
+            bars = self._fetch_aggregates(symbol, multiplier, timespan, gap[0], to_date)
+            if not self._save_bars(symbol, store_key, gap, bars):
+                return None
+        return self._slice_stored(symbol, store_key, from_date, to_date)
+    
+    def _store_gap(self, symbol, store_key, from_date):
+        """
+        Dates missing from the bar store
+        
+        Returns:
+        - (fetch_from, full): full is True when the whole range has to be
+          fetched, False for a top-up from the newest stored bar;
+          None when the store is current
+        """
+        stored_start = self.bar_store.meta(symbol, store_key).get('start')
+        last_date = self.bar_store.last_date(symbol, store_key)
+        
+        if last_date is None or stored_start is None or stored_start > from_date:
+            # Nothing usable stored yet - fetch the whole range
+            BAR_STORE_LOOKUPS.inc(result='miss')
+            return from_date, True
+        if not self.bar_store.is_current(symbol, store_key):
+            # Top up from the newest stored bar (refreshes it if it was partial)
+            BAR_STORE_LOOKUPS.inc(result='top_up')
+            return last_date, False
+        BAR_STORE_LOOKUPS.inc(result='hit')
+        return None
+    
+    def _save_bars(self, symbol, store_key, gap, bars):
+        """
+        Write bars fetched for a store gap
+        
+        Returns:
+        - False when a full fetch failed and there is nothing to serve
+        """
+        fetch_from, full = gap
+        if full:
+            if bars is None:
+                return False
+            self.bar_store.write(symbol, store_key, bars, start=fetch_from)
+        elif bars is not None:
+            self.bar_store.append(symbol, store_key, bars)
+        else:
+            log.warning("Top-up failed, serving stored bars", extra={'symbol': symbol})
+        return True
+    
+    def _slice_stored(self, symbol, store_key, from_date, to_date):
+        """Stored bars between two dates (inclusive)"""
+        start_ms = int(datetime.strptime(from_date, '%Y-%m-%d').timestamp() * 1000)
+        end_ms = int((datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)).timestamp() * 1000) - 1
+        return self.bar_store.slice(symbol, store_key, start_ms, end_ms)
+    
     def get_intraday_data(self, symbol):
         """
         Get today's intraday data
@@ -274,39 +645,55 @@ class MassiveStockFetcher:
         try:
             # use previous close instead of intraday
             endpoint = f"/v2/aggs/ticker/{symbol}/prev"
-            data = self._make_request(endpoint)
-            
-            # returns DELAYED status
-            if not data or data.get('status') not in ['OK', 'DELAYED']:
-                return None
-            
-            results = data.get('results', [])
-            if not results:
-                return None
-            
-            result = results[0]
-            
-            # Return single data point as "today's" data
-            return [{
-                'time': 'Previous Close',
-                'price': round(result.get('c', 0), 2),
-                'volume': int(result.get('v', 0))
-            }]
+            return self._parse_intraday(self._make_request(endpoint))
             
         except Exception as e:
-            print(f"Error fetching intraday data for {symbol}: {str(e)}")
+            log.error("Error fetching intraday data", extra={'symbol': symbol, 'error': str(e)})
             return None
     
-    def get_multiple_stocks_current(self, symbols):
-        """Get current prices for multiple stocks with rate limiting"""
+    def _parse_intraday(self, data):
+        """Intraday points from a previous-close response, or None"""
+        # returns DELAYED status
+        if not data or data.get('status') not in ['OK', 'DELAYED']:
+            return None
+        
+        results = data.get('results', [])
+        if not results:
+            return None
+        
+        result = results[0]
+        
+        # Return single data point as "today's" data
+        return [{
+            'time': 'Previous Close',
+            'price': round(result.get('c', 0), 2),
+            'volume': int(result.get('v', 0))
+        }]
+    
+    def get_multiple_stocks_current(self, symbols, bulk=True):
+        """
+        Get current prices for multiple stocks
+        
+        Parameters:
+        - symbols: List of stock symbols
+        - bulk: Serve from the grouped-daily market snapshot (one API call for all
+          symbols); symbols missing from it fall back to per-symbol requests
+        
+        Requests run at the caller's rate limit priority (see rate_limiter.priority_scope).
+        """
         results = []
-        for i, symbol in enumerate(symbols):
-            # Rate limiting for free tier (5 calls/min) fuck
-            if i > 0 and i % 4 == 0:
-                print(f"Rate limiting: waiting 15 seconds...")
-                time.sleep(15)
-            
-            data = self.get_current_price(symbol)
+        snapshot = self.get_market_snapshot() if bulk else None
+        bars = snapshot['bars'] if snapshot else {}
+        
+        # Symbols missing from the snapshot are fetched concurrently
+        missing = [symbol for symbol in symbols if symbol not in bars]
+        quotes = self.async_client.gather('get_current_price', missing) if missing else {}
+        
+        for symbol in symbols:
+            if symbol in bars:
+                data = self._format_quote(symbol, bars[symbol])
+            else:
+                data = quotes.get(symbol)
             if data:
                 results.append(data)
         return results
@@ -0,0 +1,294 @@
+"""
+Metrics and Stage Timing
+Dependency-free counters and histograms rendered in the Prometheus text
+format, plus per-request stage timings for Server-Timing headers
+"""
+
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds (upstream calls through multi-second training)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Stage timings of the request being handled in this context (None outside requests)
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+# Observations collected in a worker process for replay in the server process
+_captured = contextvars.ContextVar('captured_metrics', default=None)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if _capture(self, amount, labels):
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _apply(self, amount, labels):
+        self.inc(amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name + '_total', list(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if _capture(self, value, labels):
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _apply(self, value, labels):
+        self.observe(value, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield self.name + '_bucket', labels + [('le', _format_value(bound))], cumulative
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class Gauge:
+    """Value read from a callback when metrics are rendered"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, read, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # read() returns a number, or a dict of label tuple -> number
+        self.read = read
+
+    def samples(self):
+        try:
+            value = self.read()
+        except Exception:
+            return
+        if isinstance(value, dict):
+            for key, number in value.items():
+                yield self.name, list(zip(self.labelnames, key)), number
+        elif value is not None:
+            yield self.name, [], value
+
+
+class MetricsRegistry:
+    """Named collection of metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, read, labelnames=()):
+        return self._register(Gauge(name, documentation, read, labelnames))
+
+    def replay(self, observations, timings=None):
+        """
+        Apply observations captured in a worker process
+
+        Parameters:
+        - observations: List of (metric name, value, labels) from capture()
+        - timings: Optional request timing list to add stage durations to
+        """
+        for name, value, labels in observations or ():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._apply(value, labels)
+            if timings is not None and name == STAGE_SECONDS.name:
+                timings.append((labels.get('stage'), value))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _capture(metric, value, labels):
+    """Record an observation for replay instead of applying it (inside capture())"""
+    captured = _captured.get()
+    if captured is None:
+        return False
+    captured.append((metric.name, value, labels))
+    return True
+
+
+@contextmanager
+def capture():
+    """
+    Collect observations made in this context when running in a worker process
+
+    Worker processes can't update the server's registry, so prediction jobs
+    return the collected list with their result for MetricsRegistry.replay.
+    In the server process (thread pool mode) metrics are applied directly
+    and the yielded list stays empty.
+
+    Yields:
+    - List of captured observations
+    """
+    observations = []
+    if multiprocessing.parent_process() is None:
+        yield observations
+        return
+
+    token = _captured.set(observations)
+    try:
+        yield observations
+    finally:
+        _captured.reset(token)
+
+
+# REQUEST STAGE TIMINGS
+
+def start_request_timing():
+    """Begin collecting stage timings for the current request"""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def request_timings():
+    """Stage timing list of the current request (None outside one)"""
+    return _request_timings.get()
+
+
+def record_timing(name, seconds):
+    """Add a stage duration to the current request's Server-Timing entries"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def server_timing_header(timings, total=None):
+    """
+    Format stage timings as a Server-Timing header value
+
+    Repeated stages are summed; durations are in milliseconds.
+    """
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0) + seconds
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(entries)
+
+
+# Create global metrics registry instance
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'rialo_stage_seconds',
+    'Time spent in each processing stage',
+    ('stage',),
+)
+
+
+@contextmanager
+def stage(name, histogram=None, **labels):
+    """
+    Time a block as a processing stage
+
+    The duration goes to rialo_stage_seconds{stage=name} (or the given
+    histogram with labels) and to the current request's Server-Timing.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if histogram is None:
+            STAGE_SECONDS.observe(elapsed, stage=name)
+        else:
+            histogram.observe(elapsed, **labels)
+        record_timing(name, elapsed)
+
+
+# Whether responses carry Server-Timing headers with the stage breakdown
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
@@ -0,0 +1,295 @@
+"""
+Token-Bucket Rate Limiter for Massive API
+Shared by every caller in the process, with a priority queue so interactive
+requests are served before background work
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BACKGROUND = 10
+
+_current_priority = contextvars.ContextVar('rate_limit_priority', default=PRIORITY_NORMAL)
+
+
+def current_priority():
+    """Priority used by requests made in the current context"""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_scope(priority):
+    """Run a block of API calls at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def parse_retry_after(value, default=15):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class MemoryBackend:
+    """Bucket state kept in this process only"""
+
+    def __init__(self):
+        self._state = {}
+
+    def transact(self, fn):
+        # Callers already hold the limiter lock
+        return fn(self._state)
+
+
+class FileBackend:
+    """Bucket state kept in a locked file, shared by all workers on the host (POSIX only)"""
+
+    def __init__(self, path):
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("MASSIVE_RATE_BACKEND=file needs fcntl file locks, which this platform lacks; use the memory backend")
+        self._fcntl = fcntl
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def transact(self, fn):
+        with open(self.path, 'a+') as f:
+            self._fcntl.flock(f, self._fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                result = fn(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                self._fcntl.flock(f, self._fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` calls every `per` seconds
+
+    Waiting callers queue by priority; only the head of the queue may take a
+    token, so a background backfill never starves an interactive request.
+    """
+
+    def __init__(self, rate=5, per=60.0, capacity=None, backend=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity or rate
+        self.backend = backend or MemoryBackend()
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        # (loop, event) of coroutines waiting in acquire_async
+        self._async_waiters = set()
+
+    @classmethod
+    def from_env(cls):
+        """Build a limiter from MASSIVE_RATE_* environment variables"""
+        rate = int(os.getenv('MASSIVE_RATE_LIMIT', 5))
+        per = float(os.getenv('MASSIVE_RATE_PERIOD', 60))
+
+        backend = None
+        if os.getenv('MASSIVE_RATE_BACKEND', 'memory') == 'file':
+            backend = FileBackend(os.getenv('MASSIVE_RATE_FILE', '/tmp/massive_rate_limit.json'))
+
+        return cls(rate=rate, per=per, backend=backend)
+
+    def _refill(self, state, now):
+        tokens = state.get('tokens', self.capacity)
+        updated = state.get('updated', now)
+        # No refill happens while blocked by a Retry-After
+        elapsed = max(0.0, now - updated)
+        state['tokens'] = min(self.capacity, tokens + elapsed * self.rate / self.per)
+        state['updated'] = max(now, updated)
+
+    def _take(self, state):
+        """Take a token if possible, otherwise return seconds until one is available"""
+        now = time.time()
+        self._refill(state, now)
+
+        blocked_until = state.get('blocked_until', 0)
+        if now < blocked_until:
+            return blocked_until - now
+
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0
+
+        return (1 - state['tokens']) * self.per / self.rate
+
+    def _notify(self):
+        """Wake every waiter, threads and coroutines alike (caller holds the lock)"""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _poll(self, ticket, deadline):
+        """
+        Take a token for a queued ticket if it is at the head (caller holds the lock)
+
+        Returns:
+        - (result, wait): result is True when taken, False once the deadline
+          has passed and None while still queued; wait is the seconds until
+          the next check (None: until notified)
+        """
+        wait = None
+        if self._queue[0] == ticket:
+            wait = self.backend.transact(self._take)
+            if wait <= 0:
+                return True, None
+
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, None
+            wait = remaining if wait is None else min(wait, remaining)
+        return None, wait
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._queue, ticket)
+        self._notify()
+        return ticket
+
+    def _dequeue(self, ticket):
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._notify()
+
+    def acquire(self, priority=None, timeout=None):
+        """
+        Wait for a request slot
+
+        Parameters:
+        - priority: Queue priority (default: priority of the current context)
+        - timeout: Max seconds to wait (None waits indefinitely)
+
+        Returns:
+        - True when a slot was taken, False on timeout
+        """
+        if priority is None:
+            priority = current_priority()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    result, wait = self._poll(ticket, deadline)
+                    if result is not None:
+                        return result
+                    self._cond.wait(wait)
+            finally:
+                self._dequeue(ticket)
+
+    async def acquire_async(self, priority=None, timeout=None):
+        """
+        Await a request slot without blocking the event loop
+
+        Queues in the same priority order as acquire(), but waits with an
+        asyncio timer for the token deficit instead of holding a thread.
+        The wait ends early whenever the queue or budget changes, and the
+        bucket is re-checked under the lock each time.
+        """
+        if priority is None:
+            priority = current_priority()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+
+        with self._cond:
+            ticket = self._enqueue(priority)
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                with self._cond:
+                    # Cleared under the lock so a later notify always wakes us
+                    waiter[1].clear()
+                    result, wait = self._poll(ticket, deadline)
+                if result is not None:
+                    return result
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+                self._dequeue(ticket)
+
+    def penalize(self, retry_after):
+        """Block all callers for retry_after seconds (e.g. from a 429 Retry-After)"""
+        def block(state):
+            now = time.time()
+            self._refill(state, now)
+            state['tokens'] = 0
+            state['blocked_until'] = max(state.get('blocked_until', 0), now + retry_after)
+            state['updated'] = state['blocked_until']
+
+        with self._cond:
+            self.backend.transact(block)
+            self._notify()
+
+    def stats(self):
+        """Current budget and queue depth"""
+        def peek(state):
+            now = time.time()
+            self._refill(state, now)
+            return {
+                'tokens': round(state['tokens'], 2),
+                'blockedFor': round(max(0, state.get('blocked_until', 0) - now), 1),
+            }
+
+        with self._cond:
+            budget = self.backend.transact(peek)
+            queue_depth = len(self._queue)
+
+        return {
+            'rate': self.rate,
+            'per': self.per,
+            'capacity': self.capacity,
+            'backend': type(self.backend).__name__,
+            'queueDepth': queue_depth,
+            **budget,
+        }
+
+
+# Shared limiter for every fetcher in this process
+api_rate_limiter = RateLimiter.from_env()
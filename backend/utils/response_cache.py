@@ -0,0 +1,160 @@
+"""
+HTTP Response Cache for Massive API backed endpoints
+Keeps serialized responses in memory for a TTL tied to the US market
+session; each entry carries an ETag so repeat polls can get a 304
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+# US Eastern offsets; computed from the US DST rule so no tz database
+# (zoneinfo is Python 3.9+ and needs tzdata on Windows) is required
+EASTERN_STANDARD = timezone(timedelta(hours=-5), 'EST')
+EASTERN_DAYLIGHT = timezone(timedelta(hours=-4), 'EDT')
+
+
+def _nth_sunday(year, month, n):
+    """Date of the n-th Sunday of a month"""
+    first = datetime(year, month, 1)
+    return first + timedelta(days=(6 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def market_now(utc_now=None):
+    """
+    Current time in New York
+
+    DST runs from 2:00 on the second Sunday of March to 2:00 on the first
+    Sunday of November (local time).
+    """
+    utc_now = utc_now or datetime.now(timezone.utc)
+    year = utc_now.year
+    dst_start = _nth_sunday(year, 3, 2).replace(hour=7, tzinfo=timezone.utc)   # 2:00 EST
+    dst_end = _nth_sunday(year, 11, 1).replace(hour=6, tzinfo=timezone.utc)    # 2:00 EDT
+    zone = EASTERN_DAYLIGHT if dst_start <= utc_now < dst_end else EASTERN_STANDARD
+    return utc_now.astimezone(zone)
+
+
+def _session_bounds(now):
+    """Open and close datetimes of the trading session on now's date"""
+    market_open = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    market_close = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return market_open, market_close
+
+
+def seconds_until_open(now=None):
+    """Seconds until the next regular session opens (0 while it is open)"""
+    now = now or market_now()
+    market_open, market_close = _session_bounds(now)
+    if now.weekday() < 5 and market_open <= now < market_close:
+        return 0
+
+    next_open = market_open if now < market_open else market_open + timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return (next_open - now).total_seconds()
+
+
+def market_ttl(open_ttl, closed_ttl=None):
+    """
+    TTL function for cached responses
+
+    Parameters:
+    - open_ttl: Seconds to cache while the market is open
+    - closed_ttl: Max seconds to cache while closed (default RESPONSE_CACHE_TTL_CLOSED);
+      entries never outlive the next market open
+    """
+    if closed_ttl is None:
+        closed_ttl = int(os.getenv('RESPONSE_CACHE_TTL_CLOSED', 3600))
+
+    def ttl():
+        until_open = seconds_until_open()
+        if until_open <= 0:
+            return open_ttl
+        return max(open_ttl, min(closed_ttl, until_open))
+    return ttl
+
+
+class ResponseCache:
+    """LRU cache of serialized responses with per-entry expiry"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv('RESPONSE_CACHE_SIZE', 512))
+        self.enabled = os.getenv('RESPONSE_CACHE', 'true').lower() == 'true'
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key):
+        """Cached (body, etag, mimetype, expires) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] <= time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype, ttl):
+        """
+        Store a response body
+
+        Parameters:
+        - body: Serialized response bytes
+        - ttl: Seconds until the entry expires
+
+        Returns:
+        - The stored (body, etag, mimetype, expires) entry
+        """
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        entry = (body, etag, mimetype, time.time() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self):
+        """Count a conditional request answered with 304"""
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Entry count and hit/miss counters"""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'enabled': self.enabled,
+            'entries': size,
+            'maxEntries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'notModified': self.not_modified,
+        }
+
+
+# Create global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,70 @@
+"""
+Request Coalescing (single-flight)
+Concurrent callers asking for the same key wait on one in-flight call and
+share its result instead of repeating the work
+"""
+
+import threading
+
+
+class _Call:
+    """One in-flight computation"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs), or wait for the identical call already running
+
+        Parameters:
+        - key: Hashable identity of the call
+        - fn: Function to run if no call with this key is in flight
+
+        Returns:
+        - fn's result (the same object for every caller sharing the call);
+          an exception raised by fn is raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Calls in flight and callers that shared another call's result"""
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'shared': self.shared,
+            }
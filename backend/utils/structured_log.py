@@ -0,0 +1,80 @@
+"""
+Structured Logging
+Loggers whose records carry key/value fields, written as `key=value` text
+or JSON lines (LOG_FORMAT) at a configurable level (LOG_LEVEL)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+
+# LogRecord attributes that are not user fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _fields(record):
+    return {
+        key: value for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and not key.startswith('_')
+    }
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger: message key=value ...`"""
+
+    def format(self, record):
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname} {record.name}: {record.getMessage()}"
+        fields = ' '.join(f"{key}={value}" for key, value in _fields(record).items())
+        if fields:
+            line = f"{line} {fields}"
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _configure():
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        json_format = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+        handler.setFormatter(JSONFormatter() if json_format else TextFormatter())
+
+        root = logging.getLogger('rialo')
+        root.addHandler(handler)
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    """
+    Logger for a backend module
+
+    Pass structured fields with `extra`, e.g.
+    log.info("Upstream request", extra={'endpoint': 'aggs_prev', 'status': 200})
+    """
+    _configure()
+    return logging.getLogger(f"rialo.{name}")
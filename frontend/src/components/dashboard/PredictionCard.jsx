@@ -1,30 +1,56 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Brain, TrendingUp, TrendingDown, AlertCircle, RefreshCw } from 'lucide-react';
-import { predictStock } from '../../utils/api';
+import { streamPredictions } from '../../utils/api';
 import '../../styles/PredictionCard.css';
 
+// Order of the stages reported by the prediction stream
+const STAGES = ['fetching', 'training', 'inferring'];
+
 const PredictionCard = ({ symbol, currentPrice, prediction, onPredict, predicting, setPredicting }) => {
   const [days, setDays] = useState(7);
   const [error, setError] = useState(null);
-
-  const handlePredict = async () => {
-    try {
-      setPredicting(true);
-      setError(null);
-
-      const response = await predictStock(symbol, days);
-      
-      if (response.success) {
-        onPredict(response.data);
-      } else {
-        setError(response.error || 'Failed to generate prediction');
-      }
-    } catch (err) {
-      setError('Failed to connect to prediction service. Please try again.');
-      console.error('Prediction error:', err);
-    } finally {
+  const [progress, setProgress] = useState(null);
+  const closeStream = useRef(null);
+
+  // Drop a running prediction when the symbol changes or the card unmounts
+  useEffect(() => () => {
+    if (closeStream.current) {
+      closeStream.current();
+      closeStream.current = null;
       setPredicting(false);
     }
+  }, [symbol]);
+
+  const handlePredict = () => {
+    if (closeStream.current) closeStream.current();
+    setPredicting(true);
+    setError(null);
+    setProgress(null);
+
+    // Streamed so the loading view can follow fetching and per-epoch training
+    closeStream.current = streamPredictions([symbol], days, {
+      onProgress: setProgress,
+      onPrediction: onPredict,
+      onSymbolError: (event) => setError(event.error || 'Failed to generate prediction'),
+      onDone: () => {
+        closeStream.current = null;
+        setPredicting(false);
+      },
+      onError: (event) => {
+        closeStream.current = null;
+        setError('Failed to connect to prediction service. Please try again.');
+        console.error('Prediction error:', event.error);
+        setPredicting(false);
+      },
+    });
+  };
+
+  // 'active' for the current stage, 'complete' for the ones before it
+  const stepClass = (stage) => {
+    const current = STAGES.indexOf(progress?.stage);
+    const index = STAGES.indexOf(stage);
+    if (index === current) return 'step active';
+    return index < current ? 'step complete' : 'step';
   };
 
   const getTrendIcon = (trend) => {
@@ -89,9 +115,14 @@ const PredictionCard = ({ symbol, currentPrice, prediction, onPredict, predictin
           <h3>Training AI Model...</h3>
           <p>Analyzing historical data and generating predictions. This may take 30-60 seconds.</p>
           <div className="loading-steps">
-            <div className="step">📊 Fetching historical data Wen yah</div>
-            <div className="step">🧠 Training LSTM model Soon</div>
-            <div className="step">🔮 Generating predictions Skuyy</div>
+            <div className={stepClass('fetching')}>📊 Fetching historical data Wen yah</div>
+            <div className={stepClass('training')}>
+              🧠 Training LSTM model Soon
+              {progress?.stage === 'training' && progress.epoch && (
+                <span className="step-detail"> (epoch {progress.epoch}/{progress.epochs})</span>
+              )}
+            </div>
+            <div className={stepClass('inferring')}>🔮 Generating predictions Skuyy</div>
           </div>
         </div>
       )}
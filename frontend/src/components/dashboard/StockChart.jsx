@@ -44,6 +44,9 @@ const StockChart = ({ data, symbol, prediction }) => {
     fullDate: item.date
   }));
 
+  // Prediction interval (5th-95th percentile), when the server samples one
+  const intervals = prediction?.intervals;
+
   // Add prediction data if available
   if (prediction && prediction.allPredictions) {
     const lastDate = new Date(filteredData[filteredData.length - 1]?.date || new Date());
@@ -55,11 +58,20 @@ const StockChart = ({ data, symbol, prediction }) => {
       chartData.push({
         date: predDate.toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
         prediction: price,
+        lower: intervals?.p5?.[index],
+        upper: intervals?.p95?.[index],
         fullDate: predDate.toISOString()
       });
     });
   }
 
+  const seriesLabels = {
+    price: 'Actual',
+    prediction: 'Predicted',
+    lower: 'Low (5%)',
+    upper: 'High (95%)'
+  };
+
   const CustomTooltip = ({ active, payload }) => {
     if (active && payload && payload.length) {
       return (
@@ -67,7 +79,7 @@ const StockChart = ({ data, symbol, prediction }) => {
           <p className="tooltip-date">{payload[0].payload.fullDate?.split('T')[0]}</p>
           {payload.map((entry, index) => (
             <p key={index} className="tooltip-value" style={{ color: entry.color }}>
-              {entry.name === 'price' ? 'Actual' : 'Predicted'}: ${entry.value?.toFixed(2)}
+              {seriesLabels[entry.dataKey]}: ${entry.value?.toFixed(2)}
             </p>
           ))}
         </div>
@@ -134,6 +146,22 @@ const StockChart = ({ data, symbol, prediction }) => {
                 connectNulls
               />
             )}
+
+            {/* Prediction interval bounds */}
+            {intervals && ['lower', 'upper'].map((key) => (
+              <Line
+                key={key}
+                type="monotone"
+                dataKey={key}
+                stroke="#FF9800"
+                strokeOpacity={0.4}
+                strokeWidth={1}
+                strokeDasharray="2 4"
+                dot={false}
+                name={key === 'lower' ? 'Interval Low (5%)' : 'Interval High (95%)'}
+                connectNulls
+              />
+            ))}
           </LineChart>
         </ResponsiveContainer>
       </div>
@@ -148,6 +176,12 @@ const StockChart = ({ data, symbol, prediction }) => {
             <div className="legend-color dashed" style={{ backgroundColor: '#FF9800' }}></div>
             <span>Predicted Price (ML Model)</span>
           </div>
+          {intervals && (
+            <div className="legend-item">
+              <div className="legend-color dashed" style={{ backgroundColor: '#FF9800', opacity: 0.4 }}></div>
+              <span>90% Prediction Interval ({intervals.samples} samples)</span>
+            </div>
+          )}
         </div>
       )}
     </div>
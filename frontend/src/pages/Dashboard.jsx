@@ -7,6 +7,9 @@ import PredictionCard from '../components/dashboard/PredictionCard';
 import { getAllStocks, getStockDetail, getStockHistory } from '../utils/api';
 import '../styles/Dashboard.css';
 
+// Bars requested for the price chart; longer ranges are downsampled by the API
+const CHART_MAX_POINTS = 500;
+
 const Dashboard = () => {
   const navigate = useNavigate();
   const [stocks, setStocks] = useState([]);
@@ -58,8 +61,8 @@ const Dashboard = () => {
         setStockDetail(detailResponse.data);
       }
 
-      // Fetch historical data (1 year, daily)
-      const historyResponse = await getStockHistory(symbol, '1y', '1d');
+      // Fetch historical data (1 year, daily, at most ~one point per chart pixel)
+      const historyResponse = await getStockHistory(symbol, '1y', '1d', CHART_MAX_POINTS);
       if (historyResponse.success) {
         setHistoricalData(historyResponse.data);
       }
@@ -46,18 +46,35 @@ export const getStockDetail = async (symbol) => {
   }
 };
 
+/**
+ * Expand a columnar history payload into per-bar objects
+ * @param {Object} columns - Parallel arrays (t, open, high, low, close, volume)
+ */
+const columnsToRows = (columns) =>
+  columns.t.map((t, i) => ({
+    date: new Date(t).toISOString(),
+    open: columns.open[i],
+    high: columns.high[i],
+    low: columns.low[i],
+    close: columns.close[i],
+    volume: columns.volume[i],
+  }));
+
 /**
  * Get historical data for a stock
  * @param {string} symbol - Stock symbol
  * @param {string} period - Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
  * @param {string} interval - Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+ * @param {number} maxPoints - Optional cap on returned bars (server-side downsampling)
  */
-export const getStockHistory = async (symbol, period = '1y', interval = '1d') => {
+export const getStockHistory = async (symbol, period = '1y', interval = '1d', maxPoints = null) => {
   try {
-    const response = await api.get(`/stocks/${symbol}/history`, {
-      params: { period, interval },
-    });
-    return response.data;
+    const params = { period, interval, format: 'columnar' };
+    if (maxPoints) {
+      params.maxPoints = maxPoints;
+    }
+    const response = await api.get(`/stocks/${symbol}/history`, { params });
+    return { ...response.data, data: columnsToRows(response.data.data) };
   } catch (error) {
     console.error(`Error fetching ${symbol} history:`, error);
     throw error;
@@ -100,10 +117,11 @@ export const getMultipleStocks = async (symbols) => {
  * Predict future stock prices using ML model
  * @param {string} symbol - Stock symbol
  * @param {number} days - Number of days to predict (1-30)
+ * @param {string} engine - Forecasting engine: 'lstm', 'ridge' or 'ets'
  */
-export const predictStock = async (symbol, days = 7) => {
+export const predictStock = async (symbol, days = 7, engine = 'lstm') => {
   try {
-    const response = await api.post(`/predict/${symbol}`, { days });
+    const response = await api.post(`/predict/${symbol}`, { days, engine });
     return response.data;
   } catch (error) {
     console.error(`Error predicting ${symbol}:`, error);
@@ -115,10 +133,11 @@ export const predictStock = async (symbol, days = 7) => {
  * Predict multiple stocks at once
  * @param {array} symbols - Array of stock symbols
  * @param {number} days - Number of days to predict
+ * @param {string} engine - Forecasting engine: 'lstm', 'ridge' or 'ets'
  */
-export const predictMultipleStocks = async (symbols, days = 7) => {
+export const predictMultipleStocks = async (symbols, days = 7, engine = 'lstm') => {
   try {
-    const response = await api.post('/predict/batch', { symbols, days });
+    const response = await api.post('/predict/batch', { symbols, days, engine });
     return response.data;
   } catch (error) {
     console.error('Error predicting multiple stocks:', error);
@@ -126,6 +145,44 @@ export const predictMultipleStocks = async (symbols, days = 7) => {
   }
 };
 
+/**
+ * Stream predictions as each symbol finishes (Server-Sent Events)
+ * @param {array} symbols - Array of stock symbols
+ * @param {number} days - Number of days to predict
+ * @param {object} handlers - { onPrediction, onProgress, onSymbolError, onDone, onError }
+ *   onError receives { error } when the run aborts or the connection drops
+ * @returns {function} Call to close the stream
+ */
+export const streamPredictions = (symbols, days = 7, handlers = {}) => {
+  const params = new URLSearchParams({ symbols: symbols.join(','), days });
+  const source = new EventSource(`${API_BASE_URL}/predict/stream?${params}`);
+
+  // Server events always carry JSON; native EventSource events may not
+  const listen = (event, handler, terminal = false) => {
+    source.addEventListener(event, (e) => {
+      if (terminal) source.close();
+      if (handler && e.data) handler(JSON.parse(e.data));
+    });
+  };
+
+  listen('prediction', handlers.onPrediction);
+  listen('progress', handlers.onProgress);
+  listen('symbol-error', handlers.onSymbolError);
+  listen('done', handlers.onDone, true);
+  listen('failed', handlers.onError, true);
+
+  // Connection errors carry no data; stop instead of auto-reconnecting
+  // (which would start the whole run again)
+  source.onerror = (e) => {
+    if (source.readyState === EventSource.CLOSED) return;
+    source.close();
+    console.error('Prediction stream closed:', e);
+    if (handlers.onError) handlers.onError({ error: 'Connection to prediction service lost' });
+  };
+
+  return () => source.close();
+};
+
 // ============================================
 // HEALTH CHECK
 // ============================================